@@ -0,0 +1,167 @@
+import argparse
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch import POLICIES, BatchGame, roll_boards
+
+
+STATUS_NAMES = ['unfinished', 'puzzle_complete', 'puzzle_won', 'game_over']
+
+
+def _merge_counts(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    merged = np.zeros(max(len(a), len(b)), dtype=np.int64)
+    merged[:len(a)] += a
+    merged[:len(b)] += b
+    return merged
+
+
+class Summary():
+    def __init__(self, policy: str, score_bin: int = 50, moves_bin: int = 10):
+        """
+        Histograms for a set of games played under one policy. Bins have
+        fixed widths, so summaries from different workers merge by adding.
+        """
+        self.policy    = policy
+        self.moves_bin = moves_bin
+        self.score_bin = score_bin
+
+        self.moves       = np.zeros(0, dtype=np.int64)
+        self.num_games   = 0
+        self.scores      = np.zeros(0, dtype=np.int64)
+        self.statuses    = np.zeros(len(STATUS_NAMES), dtype=np.int64)
+        self.total_moves = 0
+        self.total_score = 0
+
+    def add(self, score: np.ndarray, status: np.ndarray, num_moves: np.ndarray):
+        self.num_games += len(score)
+        self.total_moves += int(num_moves.sum())
+        self.total_score += int(score.sum())
+        self.statuses += np.bincount(status, minlength=len(STATUS_NAMES))
+        self.scores = _merge_counts(
+            self.scores, np.bincount(score // self.score_bin))
+        self.moves = _merge_counts(
+            self.moves, np.bincount(num_moves // self.moves_bin))
+
+    def get_percentile(self, counts: np.ndarray, bin_width: int,
+                       percentile: float) -> int:
+        """Lower edge of the bin holding {percentile} of the games"""
+        index = np.searchsorted(np.cumsum(counts),
+                                self.num_games * percentile / 100)
+        return int(index) * bin_width
+
+    def merge(self, other: 'Summary'):
+        self.num_games += other.num_games
+        self.total_moves += other.total_moves
+        self.total_score += other.total_score
+        self.statuses += other.statuses
+        self.scores = _merge_counts(self.scores, other.scores)
+        self.moves = _merge_counts(self.moves, other.moves)
+
+    def report(self, bar_width: int = 40) -> str:
+        lines = [f'== {self.policy} ({self.num_games} games) ==']
+        for name, count in zip(STATUS_NAMES, self.statuses):
+            lines.append(f'  {name:<16}{count / self.num_games:>8.2%}')
+
+        for label, counts, bin_width, total in (
+            ('score', self.scores, self.score_bin, self.total_score),
+            ('moves', self.moves, self.moves_bin, self.total_moves)):
+            p50, p90, p99 = [self.get_percentile(counts, bin_width, p)
+                             for p in (50, 90, 99)]
+            lines.append(f'  {label}: mean {total / self.num_games:.1f}, '
+                         f'p50 {p50}, p90 {p90}, p99 {p99}')
+
+            peak = counts.max()
+            for n, count in enumerate(counts):
+                if count:
+                    bar = '#' * max(1, round(count / peak * bar_width))
+                    lines.append(
+                        f'    {n * bin_width:>6}-{(n + 1) * bin_width - 1:<6}'
+                        f'{count:>9} {bar}')
+
+        return '\n'.join(lines)
+
+
+def _run_chunk(policy: str, seed: np.random.SeedSequence, num_games: int,
+               level: int, max_moves: int | None, score_bin: int,
+               moves_bin: int, num_rows: int, num_cols: int) -> Summary:
+    rng = np.random.default_rng(seed)
+    result = BatchGame(roll_boards(num_games, num_rows, num_cols, rng), rng,
+                       level=level).run(policy, max_moves)
+
+    summary = Summary(policy, score_bin, moves_bin)
+    summary.add(result.score, result.status, result.num_moves)
+    return summary
+
+
+def analyze(num_games: int, policies: list[str], seed: int | None = None,
+            chunk_size: int = 2000, workers: int | None = None,
+            level: int = 1, max_moves: int | None = None,
+            score_bin: int = 50, moves_bin: int = 10, num_rows: int = 8,
+            num_cols: int = 8) -> dict[str, Summary]:
+    """
+    Splits {num_games} per policy into chunks, each with its own child
+    seed, so results only depend on {seed} and {chunk_size}, not on how
+    many workers run them.
+    """
+    summaries = {policy: Summary(policy, score_bin, moves_bin)
+                 for policy in policies}
+    chunk_sizes = [chunk_size] * (num_games // chunk_size)
+    if num_games % chunk_size:
+        chunk_sizes.append(num_games % chunk_size)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for policy, policy_seed in zip(
+                policies, np.random.SeedSequence(seed).spawn(len(policies))):
+            for size, chunk_seed in zip(
+                    chunk_sizes, policy_seed.spawn(len(chunk_sizes))):
+                futures.append(executor.submit(
+                    _run_chunk, policy, chunk_seed, size, level, max_moves,
+                    score_bin, moves_bin, num_rows, num_cols))
+
+        for future in futures:
+            summary = future.result()
+            summaries[summary.policy].merge(summary)
+
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Monte Carlo level difficulty analysis')
+    parser.add_argument('-n', '--games', type=int, default=100_000,
+                        help='games to simulate per policy')
+    parser.add_argument('-p', '--policies', nargs='+', choices=POLICIES,
+                        default=list(POLICIES))
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--rows', type=int, default=8)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--max-moves', type=int, default=None)
+    parser.add_argument('--score-bin', type=int, default=50)
+    parser.add_argument('--moves-bin', type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = analyze(args.games, args.policies, args.seed, args.chunk_size,
+                        args.workers, args.level, args.max_moves,
+                        args.score_bin, args.moves_bin, args.rows, args.cols)
+    elapsed = time.perf_counter() - start
+
+    for summary in summaries.values():
+        print(summary.report())
+        print()
+
+    total_games = args.games * len(args.policies)
+    print(f'{total_games} games in {elapsed:.2f}s '
+          f'({total_games / elapsed:,.0f} games/s, {args.workers} workers)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+from collections import namedtuple
+
+import numpy as np
+
+from const import BASE_SCORE, EMPTY, MOVES
+from engine import get_shifted_legal_mask
+
+
+BatchResult = namedtuple('BatchResult', ['score', 'most_dice', 'status',
+                                         'num_moves'])
+
+D_ROW    = np.array([m[2] if m[1] == 'row' else 0 for m in MOVES])
+D_COL    = np.array([m[2] if m[1] == 'col' else 0 for m in MOVES])
+POLICIES = ('random', 'bump', 'first')
+
+
+def _rotate_move_indices(indices: np.ndarray) -> np.ndarray:
+    """Vectorized engine._get_rotated_index()"""
+    return np.where(indices == 3, 1, indices + 1)
+
+
+class BatchGame():
+    def __init__(self, boards: np.ndarray, rng: np.random.Generator,
+                 level: int = 1, lookahead: int = 3,
+                 moves: np.ndarray | None = None):
+        """
+        Plays N games side by side. {values} is an (N, rows, cols) int8
+        array laid out like BoardState.values and {queue} holds, per
+        game, indices into MOVES with the active move in column 0.
+
+        If given, {moves} is an (N, M) array of MOVES indices that each
+        game deals in order before rolling its own.
+        """
+        self.moves  = moves
+        self.rng    = rng
+        self.values = boards
+        self.level  = level
+
+        num_games = len(boards)
+        self.most_dice = np.zeros(num_games, dtype=np.int32)
+        self.num_dealt = np.zeros(num_games, dtype=np.int32)
+        self.num_moves = np.zeros(num_games, dtype=np.int32)
+        self.queue     = np.zeros((num_games, 0), dtype=np.int8)
+        self.score     = np.zeros(num_games, dtype=np.int64)
+        self.status    = np.zeros(num_games, dtype=np.int8)
+
+        while self.queue.shape[1] < lookahead + 1:
+            self.spawn_moves(np.arange(num_games))
+
+        self.check_win()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def check_win(self, games: np.ndarray | None = None):
+        """
+        Sets {status} of {games} (default: all) with the same codes as
+        Game.check_win
+        """
+        games = np.arange(len(self)) if games is None else games
+        values = self.values[games]
+        counts = np.stack([(values == n).sum(axis=(1, 2))
+                           for n in range(1, 7)], axis=1)
+        has_legal_move = self.get_legal_masks(games).any(axis=(1, 2))
+
+        status = np.ones(len(games), dtype=np.int8)
+        status[(counts > 1).any(axis=1)] = 0
+        status[~has_legal_move] = 3
+        status[counts.sum(axis=1) == 0] = 2
+        self.status[games] = status
+
+    def choose_dice(self, games: np.ndarray,
+                    policy: str) -> tuple[np.ndarray]:
+        """Returns (rows, cols) of the die each of {games} plays"""
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown policy {policy!r}')
+
+        legal = self.get_legal_masks(games)
+        num_games, num_rows, num_cols = legal.shape
+
+        if policy == 'first':
+            weights = legal.astype(np.float32)
+        else:
+            weights = self.rng.random(legal.shape, dtype=np.float32)
+            if policy == 'bump':  # Always take a match when one is adjacent
+                weights += self.get_bump_mask(games)
+            weights[~legal] = -1
+
+        flat_index = weights.reshape(num_games, -1).argmax(axis=1)
+        return flat_index // num_cols, flat_index % num_cols
+
+    def get_bump_mask(self, games: np.ndarray | None = None) -> np.ndarray:
+        """
+        Dice that match their neighbor in the active move's direction, for
+        {games} (default: all)
+        """
+        games = np.arange(len(self)) if games is None else games
+        all_values = self.values[games]
+        active = self.queue[games, 0]
+        mask = np.zeros(all_values.shape, dtype=bool)
+        for n in range(len(MOVES)):
+            moving = active == n
+            if moving.any():
+                values = all_values[moving]
+                mask[moving] = (values > 0) \
+                    & (_get_neighbor_values(values, n) == values)
+
+        return mask
+
+    def get_legal_masks(self, games: np.ndarray | None = None) -> np.ndarray:
+        """
+        (N, rows, cols) mask of dice that can move, per game's active move,
+        for {games} (default: all)
+        """
+        games = np.arange(len(self)) if games is None else games
+        values = self.values[games]
+        active = self.queue[games, 0]
+        mask = np.zeros(values.shape, dtype=bool)
+        for n in range(len(MOVES)):
+            moving = active == n
+            if moving.any():
+                mask[moving] = get_shifted_legal_mask(
+                    values[moving], D_ROW[n], D_COL[n])
+
+        return mask
+
+    def get_result(self) -> BatchResult:
+        return BatchResult(self.score, self.most_dice, self.status,
+                           self.num_moves)
+
+    def run(self, policy: str = 'random',
+            max_moves: int | None = None) -> BatchResult:
+        """Plays every game until it ends or makes {max_moves} moves"""
+        while (self.status == 0).any():
+            if max_moves is not None \
+                    and self.num_moves[self.status == 0].min() >= max_moves:
+                break
+            self.step(policy, max_moves)
+
+        return self.get_result()
+
+    def spawn_moves(self, games: np.ndarray):
+        """Appends a rolled move to each game in {games}, as engine.roll_move"""
+        new = self.rng.integers(0, 4, size=len(games)).astype(np.int8)
+        if self.queue.shape[1] >= 3:
+            recent = self.queue[games, -3:]
+            repeat = (recent == recent[:, :1]).all(axis=1) \
+                & (recent[:, -1] == new)
+            new = np.where(repeat, _rotate_move_indices(new), new)
+
+        if self.moves is not None:
+            dealt = self.num_dealt[games]
+            scripted = dealt < self.moves.shape[1]
+            new[scripted] = self.moves[games[scripted], dealt[scripted]]
+        self.num_dealt[games] += 1
+
+        column = np.zeros(len(self), dtype=np.int8)
+        column[games] = new
+        self.queue = np.concatenate([self.queue, column[:, None]], axis=1)
+
+    def step(self, policy: str = 'random', max_moves: int | None = None):
+        """Plays one move in every game that hasn't ended"""
+        running = self.status == 0
+        if max_moves is not None:
+            running &= self.num_moves < max_moves
+        games = np.flatnonzero(running)
+        if not len(games):
+            return
+
+        num_rows, num_cols = self.values.shape[1:]
+        values = self.values[games]
+        active = self.queue[games, 0]
+        rows, cols = self.choose_dice(games, policy)
+        die_values = values[np.arange(len(games)), rows, cols]
+        d_row, d_col = D_ROW[active], D_COL[active]
+
+        # Slide every die at once until each one hits a die or the edge
+        dest_rows, dest_cols = rows.copy(), cols.copy()
+        index = np.arange(len(games))
+        for _ in range(max(num_rows, num_cols)):
+            next_rows, next_cols = dest_rows + d_row, dest_cols + d_col
+            free = _in_bounds(next_rows, next_cols, num_rows, num_cols)
+            free[free] = values[index[free], next_rows[free],
+                                next_cols[free]] == EMPTY
+            if not free.any():
+                break
+            dest_rows[free] = next_rows[free]
+            dest_cols[free] = next_cols[free]
+
+        values[index, rows, cols] = EMPTY
+        values[index, dest_rows, dest_cols] = die_values
+
+        # Bump the neighbor in the move direction
+        next_rows, next_cols = dest_rows + d_row, dest_cols + d_col
+        bumped = _in_bounds(next_rows, next_cols, num_rows, num_cols)
+        bumped[bumped] = values[index[bumped], next_rows[bumped],
+                                next_cols[bumped]] == die_values[bumped]
+
+        matched = np.flatnonzero(bumped)
+        if len(matched):
+            region = _flood_fill(values[matched], dest_rows[matched],
+                                 dest_cols[matched], die_values[matched])
+            num_dice = region.sum(axis=(1, 2))
+            matched_values = values[matched]
+            matched_values[region] = EMPTY
+            values[matched] = matched_values
+
+            points = BASE_SCORE * num_dice * 2 \
+                + die_values[matched].astype(np.int64) * self.level
+            self.score[games[matched]] += points
+            self.most_dice[games[matched]] = np.maximum(
+                self.most_dice[games[matched]], num_dice)
+
+        self.values[games] = values
+        self.num_moves[games] += 1
+
+        self.spawn_moves(games)
+        self.queue[games, :-1] = self.queue[games, 1:]
+        self.queue = self.queue[:, :-1]
+        self.check_win(games)
+
+
+def _flood_fill(values: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                match_values: np.ndarray) -> np.ndarray:
+    """
+    Grows a region from (rows[n], cols[n]) in each board through
+    orthogonal neighbors holding match_values[n], all boards at once
+    """
+    same = values == match_values[:, None, None]
+    region = np.zeros(values.shape, dtype=bool)
+    region[np.arange(len(values)), rows, cols] = True
+
+    while True:
+        grown = region.copy()
+        grown[:, 1:, :]  |= region[:, :-1, :]
+        grown[:, :-1, :] |= region[:, 1:, :]
+        grown[:, :, 1:]  |= region[:, :, :-1]
+        grown[:, :, :-1] |= region[:, :, 1:]
+        grown &= same
+        if (grown == region).all():
+            return region
+        region = grown
+
+
+def _get_neighbor_values(values: np.ndarray, move_index: int) -> np.ndarray:
+    """
+    Shifts each board so every space holds the value of its neighbor in
+    the direction of MOVES[move_index] (EMPTY past the edge)
+    """
+    src, dst = [Ellipsis], [Ellipsis]
+    for size, step in zip(values.shape[-2:],
+                          (D_ROW[move_index], D_COL[move_index])):
+        if step > 0:
+            src.append(slice(step, size))
+            dst.append(slice(0, size - step))
+        elif step < 0:
+            src.append(slice(0, size + step))
+            dst.append(slice(-step, size))
+        else:
+            src.append(slice(0, size))
+            dst.append(slice(0, size))
+
+    neighbors = np.full(values.shape, EMPTY, dtype=np.int8)
+    neighbors[tuple(dst)] = values[tuple(src)]
+    return neighbors
+
+
+def _in_bounds(rows: np.ndarray, cols: np.ndarray, num_rows: int,
+               num_cols: int) -> np.ndarray:
+    return (rows > -1) & (rows < num_rows) & (cols > -1) & (cols < num_cols)
+
+
+def roll_boards(num_games: int, num_rows: int = 8, num_cols: int = 8,
+                rng: np.random.Generator | None = None) -> np.ndarray:
+    """Vectorized engine.roll_board(): returns (N, rows, cols) int8 boards"""
+    rng = np.random.default_rng() if rng is None else rng
+    shape = (num_games, num_rows, num_cols)
+
+    values = rng.integers(0, 7, size=shape).astype(np.int8)
+    values[rng.integers(1, 7, size=shape) == 1] = EMPTY  # ~17% empty
+    return values
+
+
+def simulate(num_games: int, policy: str = 'random', seed: int | None = None,
+             level: int = 1, max_moves: int | None = None,
+             num_rows: int = 8, num_cols: int = 8) -> BatchResult:
+    rng = np.random.default_rng(seed)
+    game = BatchGame(roll_boards(num_games, num_rows, num_cols, rng), rng,
+                     level=level)
+    return game.run(policy, max_moves)
@@ -0,0 +1,361 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+
+from collections.abc import Callable
+from pathlib import Path
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # Runs headless by default
+
+import numpy as np
+import pygame as pg
+
+import engine
+
+from board import Board
+from const import SCREEN_SIZE, TILE_SIZE
+from game import Game
+from image import SpriteSheet
+from solver import Solver
+
+
+BASE_PATH = Path(os.path.dirname(os.path.abspath(__file__)))
+MAX_FRAMES = 5000  # Per simulated game, in case a policy never finishes
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.2f} {unit}'
+    return f'{seconds / 1e-9:.0f} ns'
+
+
+def _make_big_board(size: int = 128) -> engine.BoardState:
+    """A {size}x{size} board with a die or rock on every space"""
+    rng = random.Random(0)
+    values = np.array([[rng.randint(0, 6) for _ in range(size)]
+                       for _ in range(size)], dtype=np.int8)
+    return engine.BoardState(size, size, values)
+
+
+def _make_game(seed: int = 0) -> Game:
+    """A game whose opening drop animation has finished"""
+    game = Game(BASE_PATH, seed)
+    while game.is_animating():
+        game.update(False)
+    game.update(False)
+
+    return game
+
+
+def _play_game(seed: int) -> int:
+    """Plays random legal moves through Game, frame by frame, until it ends"""
+    game = Game(BASE_PATH, seed)
+    rng = random.Random(seed)
+    for _ in range(MAX_FRAMES):
+        game.update(False)
+        if game.paused:
+            break
+
+        if not game.is_animating():
+            moves = engine.legal_moves(game.board.grid,
+                                       game.move_queue.get_active_move())
+            game.play_move(game.board.get_die_from_coords(*rng.choice(moves)))
+
+    return game.num_moves
+
+
+def _play_engine_game(seed: int) -> int:
+    rng = random.Random(seed)
+    state = engine.GameState(rng=rng)
+    while state.check_win() == 0:
+        state.apply_move(*rng.choice(state.legal_moves()))
+
+    return state.num_moves
+
+
+def bench_board_draw():
+    board = _make_game().board
+
+    def run():
+        board.add_dirty_rect(board.rect)
+        board.draw()
+    return run
+
+
+def bench_board_update():
+    """
+    One tick of the opening drop, which starts over once every die has
+    landed, so each call has dice to update (a settled board has none)
+    """
+    board = Game(BASE_PATH, 0).board
+    drops = [(die, die.curve, die.anchor, die.curve_delay)
+             for die in board.grid.animating]
+
+    def run():
+        if not board.grid.animating:
+            for die, curve, anchor, delay in drops:
+                die.set_curve(curve, anchor, delay)
+                die.freeze_z_index = True
+        board.update(False, True)
+    return run
+
+
+def bench_get_die_from_coords():
+    board = _make_game().board
+    coords = [(row, col) for row in range(board.num_rows)
+              for col in range(board.num_cols)]
+
+    def run():
+        for row, col in coords:
+            board.get_die_from_coords(row, col)
+    return run
+
+
+def bench_get_hovered_die():
+    board = _make_game().board
+    positions = [die.pos + TILE_SIZE / 2 for die in board.dice]
+    positions += [pg.math.Vector2(x, y) for x in range(0, 320, 40)
+                  for y in range(0, 300, 40)]
+    mouse_positions = itertools.cycle(positions)
+    board.get_mouse_pos = lambda: next(mouse_positions)
+
+    return board.get_hovered_die
+
+
+def bench_get_matching_neighbors():
+    board = _make_game().board
+    dice = [die for die in board.dice if die.value > 0]
+
+    def run():
+        for die in dice:
+            board.get_matching_neighbors(die)
+    return run
+
+
+def bench_info_update():
+    game = _make_game()
+    scores = itertools.count()  # A new score every call, so it re-renders
+
+    return lambda: game.info.update(next(scores), game.level, game.num_moves,
+                                    game.most_dice, game.board.grid.counts)
+
+
+def bench_solver_hint():
+    rng = engine.make_rngs(0)[0]
+    state = engine.GameState(engine.roll_board(rng=rng), engine.QueueState(rng),
+                             rng=rng)
+
+    # A cold table and no time limit, so every call searches the same tree
+    return lambda: Solver().hint(state.board, state.queue.moves,
+                                 time_limit=10)
+
+
+def bench_sprite_sheet():
+    return lambda: SpriteSheet(BASE_PATH)
+
+
+def bench_get_matching_region():
+    board = _make_big_board()
+    coords = [(row, col) for row in range(0, board.num_rows, 16)
+              for col in range(0, board.num_cols, 16)]
+
+    def run():
+        for row, col in coords:
+            engine.get_matching_region(board, row, col)
+    return run
+
+
+def bench_label_components():
+    board = _make_big_board()
+    return lambda: engine.label_components(board)
+
+
+def bench_engine_game():
+    return lambda: _play_engine_game(0)  # Same game every call
+
+
+def bench_game():
+    return lambda: _play_game(0)
+
+
+BENCHMARKS = {
+    'board.draw':                   bench_board_draw,
+    'board.get_die_from_coords':    bench_get_die_from_coords,
+    'board.get_hovered_die':        bench_get_hovered_die,
+    'board.get_matching_neighbors': bench_get_matching_neighbors,
+    'board.update':                 bench_board_update,
+    'engine.get_matching_region':   bench_get_matching_region,
+    'engine.label_components':      bench_label_components,
+    'engine_game':                  bench_engine_game,
+    'game':                         bench_game,
+    'info.update':                  bench_info_update,
+    'solver.hint':                  bench_solver_hint,
+    'sprite_sheet':                 bench_sprite_sheet,
+}
+
+
+def measure_memory(num_rows: int = 64, num_cols: int = 64) -> dict:
+    """
+    Bytes a freshly dealt board allocates, per die, traced with
+    tracemalloc. That covers the dice and the grid and other board
+    bookkeeping; surfaces live in SDL and aren't counted, but dice only
+    share the sprite sheet's.
+    """
+    sprite_sheet = SpriteSheet(BASE_PATH)
+    tracemalloc.start()
+    board = Board(sprite_sheet, random.Random(0), random.Random(0), num_rows,
+                  num_cols)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'bytes':         size,
+        'bytes_per_die': size / len(board.dice),
+        'num_dice':      len(board.dice),
+        'peak':          peak,
+    }
+
+
+def run_benchmark(setup: Callable[[], Callable], rounds: int = 5,
+                  min_time: float = 0.2) -> dict:
+    """
+    Times {rounds} rounds of the callable returned by {setup}. Each round
+    repeats the call enough times to take at least {min_time} seconds;
+    times are per call, in seconds.
+    """
+    timer = timeit.Timer(setup())
+    iterations, elapsed = timer.autorange()
+    if elapsed < min_time:
+        iterations = max(1, int(iterations * min_time / elapsed))
+
+    times = [t / iterations for t in timer.repeat(rounds, iterations)]
+    return {
+        'iterations': iterations,
+        'max':        max(times),
+        'mean':       statistics.mean(times),
+        'median':     statistics.median(times),
+        'min':        min(times),
+        'rounds':     rounds,
+        'stdev':      statistics.stdev(times) if rounds > 1 else 0.0,
+    }
+
+
+def run(names: list[str], rounds: int = 5) -> dict:
+    pg.init()
+    pg.font.init()
+    pg.display.set_mode(SCREEN_SIZE)
+
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(BENCHMARKS[name], rounds)
+        print(f'{name:<30}{_format_time(results[name]["median"]):>12}'
+              f'  (min {_format_time(results[name]["min"])}, '
+              f'{results[name]["iterations"]} x {rounds})')
+
+    return {
+        'machine': {
+            'numpy':    np.__version__,
+            'platform': platform.platform(),
+            'pygame':   pg.version.ver,
+            'python':   platform.python_version(),
+        },
+        'time':       time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'benchmarks': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1,
+            stat: str = 'median') -> list[str]:
+    """
+    Prints each benchmark's change in {stat} from {baseline} and returns
+    the names of those more than {threshold} (a fraction) slower
+    """
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        if name not in baseline['benchmarks']:
+            print(f'{name:<30}{"new":>12}')
+            continue
+
+        old, new = baseline['benchmarks'][name][stat], result[stat]
+        change = new / old - 1
+        if change > threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = 'faster'
+        else:
+            flag = ''
+        print(f'{name:<30}{_format_time(old):>12}{_format_time(new):>12}'
+              f'{change:>+9.1%}  {flag}'.rstrip())
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks for the game\'s hot paths (runs headless)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser(
+        'run', help='run the benchmarks, optionally saving a JSON baseline')
+    compare_parser = subparsers.add_parser(
+        'compare', help='compare against a baseline; exits 1 on regressions')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path, nargs='?',
+                                help='saved results (default: run them now)')
+    compare_parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                                help='slowdown to flag, as a fraction')
+    compare_parser.add_argument('--stat', default='median',
+                                choices=['min', 'mean', 'median'])
+    memory_parser = subparsers.add_parser(
+        'memory', help='measure how much memory a board takes per die')
+    memory_parser.add_argument('--rows', type=int, default=64)
+    memory_parser.add_argument('--cols', type=int, default=64)
+
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument('-k', '--names', nargs='+', choices=BENCHMARKS,
+                               default=list(BENCHMARKS))
+        subparser.add_argument('-o', '--output', type=Path, default=None,
+                               help='save results as JSON')
+        subparser.add_argument('-r', '--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'memory':
+        pg.init()
+        pg.display.set_mode(SCREEN_SIZE)
+        result = measure_memory(args.rows, args.cols)
+        print(f'{args.rows}x{args.cols} board, {result["num_dice"]} dice: '
+              f'{result["bytes_per_die"]:,.0f} bytes/die '
+              f'({result["bytes"] / 2**20:.2f} MiB, '
+              f'peak {result["peak"] / 2**20:.2f} MiB)')
+        return
+
+    if args.command == 'compare' and args.current:
+        current = json.loads(args.current.read_text())
+    else:
+        current = run(args.names, args.rounds)
+
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2))
+
+    if args.command == 'compare':
+        print()
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(baseline, current, args.threshold, args.stat)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) over '
+                  f'{args.threshold:.0%}: {", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
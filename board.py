@@ -1,84 +1,167 @@
-from pathlib import Path
-from random import randint
+import heapq
+import math
+import random
+
+from operator import itemgetter
 
 import pygame as pg
-from shapely import Point, Polygon
+
+import engine
 
 from const import Color, BANNER_POS, BOARD_POS, BTN_POS_LOW, BTN_POS_HIGH, \
-                  DIE_SPRITE_SIZE, INFO_POS, MINI_DIE_SIZE, SCREEN_SIZE, \
-                  SCORE_LETTER_SIZE, SCORE_LETTER_WIDTHS, TILE_GAP, TILE_SIZE
-from dice import Dice
+                  BTN_SIZE, DIE_HITBOX, DIE_SPRITE_SIZE, EMPTY, INFO_POS, \
+                  MINI_DIE_SIZE, NEW_GAME_BTN_POS, NEW_GAME_BTN_SIZE, \
+                  SCREEN_SIZE, SCORE_LETTER_SIZE, SCORE_LETTER_WIDTHS, \
+                  SELECTION_SIZE, TILE_GAP, TILE_SIZE
+from dice import Dice, DiceStore
+from grid import Grid
 from image import SpriteSheet
-from move_queue import Move
+
+
+def _is_inside(point: pg.math.Vector2, polygon: tuple[tuple[int]]) -> bool:
+    """Strictly inside a convex polygon, i.e. not on any of its edges"""
+    sides = set()
+    for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1]):
+        cross = (x2 - x1) * (point.y - y1) - (y2 - y1) * (point.x - x1)
+        if not cross:
+            return False
+        sides.add(cross > 0)
+
+    return len(sides) == 1
 
 
 class Board(pg.sprite.Sprite):
-    def __init__(self, sprite_sheet: SpriteSheet, base_path: Path):
+    button_hitboxes = (pg.Rect(BTN_POS_HIGH, BTN_SIZE),
+                       pg.Rect(BTN_POS_LOW, BTN_SIZE))
+
+    def __init__(self, sprite_sheet: SpriteSheet, rng: random.Random = random,
+                 animation_rng: random.Random = random, num_rows: int = 8,
+                 num_cols: int = 8,
+                 board_state: engine.BoardState | None = None):
+        """
+        Dice positions (see get_die_pos()) are on the whole board, which
+        can be much bigger than {image}; {view} is the area of the board
+        that {image} shows, and anything outside of it isn't drawn.
+
+        The dice are dealt from {rng}, unless {board_state} gives them.
+        """
         pg.sprite.Sprite.__init__(self)
 
+        self.animation_rng    = animation_rng
+        self.rng              = rng
         self.sprite_sheet     = sprite_sheet
 
         self.chosen_die       = None
-        self.num_cols         = 8
-        self.num_rows         = 8
+        self.num_cols         = num_cols
+        self.num_rows         = num_rows
         self.score_displays   = []
         self.scoring_move     = {}
 
         self.banner            = None
         self.color             = Color()
         self.dice              = []
-        self.legal_move_exists = False
-        self.shadows           = []
+        self.dice_store        = DiceStore(num_rows * num_cols)
+        self.grid              = Grid(self.num_rows, self.num_cols)
+        self.moving_dice       = []  # Animating dice, in draw order
+        self.moving_z_indices  = []  # z_index of each of {moving_dice}
         self.highlight_coords  = pg.math.Vector2(0, 0)
         self.show_highlight    = 0  # [-1, 0, 1]
 
-        self.background_image = pg.image.load(base_path / 'img' / 'bg.bmp')
+        self.background_image = sprite_sheet.board_bg
         self.rect = self.background_image.get_rect()
         self.image = pg.Surface(self.rect.size, pg.SRCALPHA)  # (320, 304)
+        self.static_layer = None  # See get_static_layer()
+
+        # Regions of {image} waiting to be redrawn, and those redrawn by
+        # the last draw(); see Game.get_dirty_rects()
+        self.dirty_rects     = [self.rect.copy()]
+        self.drawn_banner    = None
+        self.drawn_highlight = (0, (0, 0))
+        self.drawn_moving    = []  # Board areas of {moving_dice} last draw()
+        self.drawn_rects     = []
 
-        self.spawn_dice()
+        self.view = self.rect.copy()
+        self.view.center = self.get_world_rect().center
+        self.scroll(0, 0)
 
-    def choose_button(self):
+        self.spawn_dice(board_state)
+
+    def add_dirty_rect(self, rect: pg.Rect):
+        """Takes an area of the board; only the part in {view} is kept"""
+        rect = rect.clip(self.view)
+        if rect.size != (0, 0):
+            self.dirty_rects.append(rect.move(-self.view.x, -self.view.y))
+
+    def choose_button(self) -> int | None:
         mouse_pos = self.get_mouse_pos()
         if self.rect.collidepoint(mouse_pos):
-            mouse_point = Point(mouse_pos)
-
-            hitbox = Polygon(
-                (BTN_POS_HIGH, BTN_POS_HIGH + (105, 0),
-                 BTN_POS_HIGH + (105, 23), BTN_POS_HIGH + (0, 23))
-            )
-            if hitbox.contains(mouse_point):
-                return 0
-
-            hitbox = Polygon(
-                (BTN_POS_LOW, BTN_POS_LOW + (105, 0),
-                 BTN_POS_LOW + (105, 23), BTN_POS_LOW + (0, 23))
-            )
-            if hitbox.contains(mouse_point):
-                return 1
+            for n, hitbox in enumerate(self.button_hitboxes):
+                if hitbox.collidepoint(mouse_pos):
+                    return n
 
         return None
 
     def choose_die_under_mouse(self):
         self.chosen_die = self.get_hovered_die()
 
-    def draw(self):
-        self.image.fill(self.color.black)
-        self.image.blit(self.background_image, (0, 0))
-
-        for shadow_pos in self.shadows:
-            self.image.blit(self.sprite_sheet.shadow, shadow_pos)
-
-        for die in self.get_all_dice(sort=True):
-            self.image.blit(die.get_image(), die.pos)
+    def draw(self, alpha: float = 1.0):
+        """
+        Redraws only the area covered by {dirty_rects}. Moving dice are
+        drawn {alpha} of the way from where they were before the last
+        update() to where they are now.
+        """
+        if self.banner != self.drawn_banner:
+            self.add_dirty_rect(self.view)
+            self.drawn_banner = self.banner
+
+        highlight = (self.show_highlight, tuple(self.highlight_coords))
+        if highlight != self.drawn_highlight:
+            for _, coords in (self.drawn_highlight, highlight):
+                self.add_dirty_rect(
+                    pg.Rect(coords, SELECTION_SIZE).inflate(2, 2))
+            self.drawn_highlight = highlight
+
+        moving = list(self.grid.animating)
+        z_indices = self.get_z_indices(moving)
+        order = sorted(range(len(moving)), key=z_indices.__getitem__)
+        self.moving_dice = [moving[n] for n in order]
+        self.moving_z_indices = [z_indices[n] for n in order]
+
+        # In-between positions change every draw, not just every update()
+        moving_rects = [die.get_draw_rect(alpha) for die in self.moving_dice]
+        for rect in self.drawn_moving + moving_rects:
+            self.add_dirty_rect(rect)
+        self.drawn_moving = moving_rects
+
+        self.drawn_rects, self.dirty_rects = self.dirty_rects, []
+        if not self.drawn_rects:
+            return
+
+        clip = self.drawn_rects[0].unionall(self.drawn_rects[1:])
+        self.image.set_clip(clip)
+        self.image.blit(self.get_static_layer(), (0, 0))
+
+        offset = pg.math.Vector2(self.view.topleft)
+        dice = self.get_visible_dice(clip.move(self.view.topleft), alpha)
+
+        # Dice at rest are all drawn plain, at positions read in one go
+        positions = (self.dice_store.pos[[die.index for die in dice]]
+                     - self.view.topleft).tolist()
+        for die, pos in zip(dice, positions):
+            if die in self.grid.animating:
+                pos = die.get_draw_pos(alpha) - offset
+                self.image.blit(die.get_image(), pos)
+            else:
+                self.image.blit(die.images['image'], pos)
 
         if self.show_highlight:
             highlight = self.sprite_sheet.highlight \
                 if self.show_highlight == 1 else self.sprite_sheet.dimlight
-            self.image.blit(highlight, self.highlight_coords)
+            self.image.blit(highlight, self.highlight_coords - offset)
 
         for score_display in self.score_displays:
-            self.image.blit(score_display['image'], score_display['pos'])
+            self.image.blit(score_display['image'],
+                            score_display['pos'] - offset)
 
         if self.banner:
             self.image.blit(
@@ -91,40 +174,53 @@ class Board(pg.sprite.Sprite):
             else:
                 self.image.blit(self.sprite_sheet.restart_button, BTN_POS_HIGH)
 
-    def get_all_dice(self, sort: bool = False) -> list[Dice]:
-        """Returns flattened list from 2D list"""
-        if not sort:
-            return self.dice
+        self.image.set_clip(None)
+
+    def get_static_layer(self) -> pg.Surface:
+        """
+        The background and tile shadows never change within a level (or
+        until the view scrolls), so they're composited once and drawn
+        with a single blit
+        """
+        if self.static_layer is None:
+            self.static_layer = pg.Surface(self.rect.size)
+            self.static_layer.fill(self.color.black)
+            self.static_layer.blit(self.background_image, (0, 0))
+
+            offset = pg.math.Vector2(self.view.topleft) - (0, 19)
+            for row, col in self.get_visible_coords(self.view):
+                self.static_layer.blit(self.sprite_sheet.shadow,
+                                       self.get_die_pos(row, col) - offset)
 
-        return sorted(self.dice, key=lambda d: d.z_index)  # Sort by draw order
+        return self.static_layer
 
     def get_coords_in_direction(self, start_row: int, start_col: int, axis: str,
                                 value: int) -> tuple[int]:
         if axis == 'row':
-            if not -1 < start_row + value < 8:
-                raise IndexError
-            return start_row + value, start_col
+            coords = start_row + value, start_col
         else:
-            if not -1 < start_col + value < 8:
-                raise IndexError
-            return start_row, start_col + value
+            coords = start_row, start_col + value
 
-    def get_die_from_coords(self, row: int, col: int) -> Dice | None:
-        if not (-1 < col < 8) or not (-1 < row < 8):
+        if not self.grid.contains(*coords):
             raise IndexError
+        return coords
 
-        try:
-            return [d for d in self.dice if d.row == row and d.col == col][0]
-        except IndexError:
-            return None
+    def get_die_from_coords(self, row: int, col: int) -> Dice | None:
+        return self.grid.get(row, col)  # Raises IndexError off the board
 
     def get_die_pos(self, row: int, col: int) -> pg.math.Vector2:
-        """Translates row & col into pixel position"""
+        """
+        Translates row & col into pixel position. The board is centered
+        across {rect}, with its bottom corner at the bottom.
+        """
         x_step = TILE_SIZE.x / 2 + TILE_GAP
         y_step = TILE_SIZE.y / 2 + TILE_GAP
 
-        x = (self.rect.width - (DIE_SPRITE_SIZE.x * 8 + 14 * TILE_GAP)) // 2
-        y = self.rect.height - DIE_SPRITE_SIZE.y * 3
+        width = (self.num_rows + self.num_cols - 2) * x_step \
+            + DIE_SPRITE_SIZE.x
+        x = (self.rect.width - width) // 2
+        y = self.rect.height - DIE_SPRITE_SIZE.y - 2 \
+            - (self.num_rows - 1) * y_step
         x += x_step * col
         y -= y_step * col
         x += x_step * row
@@ -133,41 +229,100 @@ class Board(pg.sprite.Sprite):
         return pg.math.Vector2(x, y)
 
     def get_hovered_die(self) -> Dice | None:
+        """
+        Inverts get_die_pos() to find the nearest space to the mouse, then
+        checks the top faces of the dice in and around it
+        """
         mouse_pos = self.get_mouse_pos()
-        if self.rect.collidepoint(mouse_pos):
-            mouse_point = Point(mouse_pos)
-
-            for die in self.get_all_dice():
-                hitbox = Polygon(
-                    (die.pos + (0, 8), die.pos + (15, 0),
-                     die.pos + (31, 8), die.pos + (15, 16))
-                )
-                if hitbox.contains(mouse_point):
-                    return die
-
-        return None
-
-    def get_matching_neighbors(self, matching_value: int,
-                               match: Dice) -> list[Dice]:
-        def explore(row: int, col: int, visited: set[Dice] | None = None):
-            if visited is None:
-                visited = set()
+        if not self.rect.collidepoint(mouse_pos):
+            return None
 
-            die = self.get_die_from_coords(row, col)
-            if die in visited:
-                return
+        mouse_pos += self.view.topleft
+        origin = self.get_die_pos(0, 0) + TILE_SIZE / 2
+        diagonal = (mouse_pos.x - origin.x) / (TILE_SIZE.x / 2 + TILE_GAP)
+        anti_diagonal = (mouse_pos.y - origin.y) / (TILE_SIZE.y / 2 + TILE_GAP)
+        row = round((diagonal + anti_diagonal) / 2)  # row + col = diagonal
+        col = round((diagonal - anti_diagonal) / 2)  # row - col = anti_diagonal
 
-            visited.add(die)
+        for r in range(row - 1, row + 2):
+            for c in range(col - 1, col + 2):
+                if self.grid.contains(r, c):
+                    die = self.grid.dice[r][c]
+                    if die and _is_inside(mouse_pos - die.pos, DIE_HITBOX):
+                        return die
 
-            if die.value == matching_value:
-                result.add(die)
+        return None
 
-                for neighbor in self.get_neighbors(die):
-                    explore(neighbor.row, neighbor.col, visited)
+    def get_visible_coords(self, rect: pg.Rect) -> list[tuple[int]]:
+        """
+        Coords of the spaces whose die sprite would overlap {rect} (an
+        area of the board), back to front, without checking every space.
 
-        result = set([match])
-        explore(match.row, match.col)
-        return list(result)
+        get_die_pos() is linear in row + col (x) and row - col (y), so
+        {rect} bounds both; a die at rest is drawn after every die on a
+        lower row - col diagonal, and dice on the same one never overlap.
+        """
+        x_step = TILE_SIZE.x / 2 + TILE_GAP
+        y_step = TILE_SIZE.y / 2 + TILE_GAP
+        near_x, near_y = self.get_die_pos(0, 0)  # Top left of (0, 0)
+        far_x, far_y = self.get_die_pos(0, 0) + DIE_SPRITE_SIZE
+
+        min_sum = math.ceil((rect.left - far_x) / x_step)
+        max_sum = math.floor((rect.right - near_x) / x_step)
+        min_diff = max(math.ceil((rect.top - far_y) / y_step),
+                       1 - self.num_cols)
+        max_diff = min(math.floor((rect.bottom - near_y) / y_step),
+                       self.num_rows - 1)
+
+        coords = []
+        for diff in range(min_diff, max_diff + 1):
+            # col = row - diff, and min_sum <= row + col <= max_sum
+            first_row = max(0, diff, math.ceil((min_sum + diff) / 2))
+            last_row = min(self.num_rows - 1, self.num_cols - 1 + diff,
+                           (max_sum + diff) // 2)
+            coords += [(row, row - diff)
+                       for row in range(first_row, last_row + 1)]
+
+        return coords
+
+    def get_visible_dice(self, rect: pg.Rect,
+                         alpha: float = 1.0) -> list[Dice]:
+        """
+        Dice that might overlap {rect} (an area of the board) when drawn
+        at {alpha} (see draw()), in draw order. Dice at rest come in
+        order straight off the grid, so only {moving_dice} needs sorting,
+        and that's done once per draw().
+        """
+        resting = []
+        for row, col in self.get_visible_coords(rect):
+            die = self.grid.dice[row][col]
+            if die and die not in self.grid.animating:
+                resting.append(die)
+
+        # Moving dice can be anywhere between spaces
+        moving = [(z_index, die) for z_index, die
+                  in zip(self.moving_z_indices, self.moving_dice)
+                  if die.get_draw_rect(alpha).colliderect(rect)]
+        if not moving:
+            return resting
+
+        resting = zip(self.get_z_indices(resting), resting)
+        return [die for _, die in heapq.merge(resting, moving,
+                                              key=itemgetter(0))]
+
+    def get_world_rect(self) -> pg.Rect:
+        """Area of the board covered by dice at rest"""
+        left = self.get_die_pos(0, 0).x
+        right = self.get_die_pos(self.num_rows - 1, self.num_cols - 1).x
+        top = self.get_die_pos(0, self.num_cols - 1).y
+        bottom = self.get_die_pos(self.num_rows - 1, 0).y
+
+        return pg.Rect(left, top, right - left + DIE_SPRITE_SIZE.x,
+                       bottom - top + DIE_SPRITE_SIZE.y)
+
+    def get_matching_neighbors(self, match: Dice) -> list[Dice]:
+        return [self.grid.dice[row][col] for row, col in
+                engine.get_matching_region(self.grid, match.row, match.col)]
 
     def get_mouse_pos(self) -> pg.math.Vector2:
         return (
@@ -184,25 +339,23 @@ class Board(pg.sprite.Sprite):
 
     def get_neighbors(self, die: Dice) -> list[Dice]:
         neighbors = []
-        nw_neighbor = (die.row - 1, die.col)
-        ne_neighbor = (die.row, die.col + 1)
-        se_neighbor = (die.row + 1, die.col)
-        sw_neighbor = (die.row, die.col - 1)
-        neighbor_coords = [nw_neighbor, ne_neighbor, se_neighbor, sw_neighbor]
-        for coord in neighbor_coords:
-            try:
-                neighbor = self.get_die_from_coords(*coord)
-                if neighbor:
-                    neighbors.append(neighbor)
-            except IndexError:
-                continue
+        table = engine.get_neighbor_table(self.num_rows, self.num_cols)
+        for index in table[die.row * self.num_cols + die.col]:
+            neighbor = self.grid.dice[index // self.num_cols] \
+                                     [index % self.num_cols]
+            if neighbor:
+                neighbors.append(neighbor)
 
         return neighbors
 
+    def get_z_indices(self, dice: list[Dice]) -> list[float]:
+        """z_index of each of {dice}, read out of the store in one go"""
+        return self.dice_store.z_index[[die.index for die in dice]].tolist()
+
     def highlight_hovered_die(self):
         die = self.get_hovered_die()
         if die:
-            if die.offsets:  # Don't highlight during animation
+            if die.is_animating():  # Don't highlight during animation
                 self.show_highlight = 0
                 return
 
@@ -218,37 +371,66 @@ class Board(pg.sprite.Sprite):
         else:
             self.show_highlight = 0
 
+    def invalidate_static_layer(self):
+        """Call after changing {background_image} or {view}"""
+        self.static_layer = None
+        self.add_dirty_rect(self.view)
+
     def remove_die(self, die: Dice):
+        self.add_dirty_rect(die.get_draw_rect())
+        self.grid.remove(die)
         self.dice.pop(self.dice.index(die))
 
-    def spawn_dice(self):
-        from game import _roll_d6
+    def scroll(self, dx: int, dy: int):
+        """Moves {view}, keeping it on the board where the board allows"""
+        world = self.get_world_rect()
+        view = self.view.move(dx, dy)
+        if world.width <= view.width:
+            view.x = 0
+        else:
+            view.x = min(max(view.x, world.left), world.right - view.width)
+        if world.height <= view.height:
+            view.y = 0
+        else:
+            view.y = min(max(view.y, world.top), world.bottom - view.height)
+
+        if view != self.view:
+            self.view = view
+            self.invalidate_static_layer()
+
+    def spawn_dice(self, state: engine.BoardState | None = None):
+        """
+        Only dice in {view} drop in; on a big board, the rest are already
+        in place by the time they could be scrolled to
+        """
+        if state is None:
+            state = engine.roll_board(self.num_rows, self.num_cols, self.rng)
+        visible = set(self.get_visible_coords(self.view))
+        first_row = min(row for row, _ in visible)
+        first_col = min(col for _, col in visible)
+
+        images = {  # Sprite sheet surfaces, one dict shared by each value
+            value: {
+                'image': self.sprite_sheet.dice[value],
+                'ghost': self.sprite_sheet.dice_ghosts[value],
+                'flash_solid': self.sprite_sheet.dice_flash['solid'],
+                'flash_wireframe': self.sprite_sheet.dice_flash['wireframe'],
+            } for value in self.sprite_sheet.dice}
 
-        image = self.sprite_sheet.dice
         for row in range(self.num_rows):
             for col in range(self.num_cols):
-                if _roll_d6() > 1:  # ~17% of spaces should be empty
-                    animation_delay = row * 5 + col * 2 + randint(0, 8)
-                    value = randint(0, 6)
-                    image = self.sprite_sheet.dice[value]
-                    ghost_image = self.sprite_sheet.dice_ghosts[value]
-                    images = {
-                    'image': image,
-                    'ghost': ghost_image,
-                    'flash_solid': pg.Surface((DIE_SPRITE_SIZE), pg.SRCALPHA),
-                    'flash_wireframe': pg.Surface((DIE_SPRITE_SIZE),
-                                                   pg.SRCALPHA)
-                    }
-                    images['flash_solid'].blit(
-                        self.sprite_sheet.dice_flash['solid'], (0, 0))
-                    images['flash_wireframe'].blit(
-                        self.sprite_sheet.dice_flash['wireframe'], (0, 0))
-                    self.dice.append(
-                        Dice(row, col, value, self.get_die_pos(row, col),
-                             animation_delay, images)
-                    )
-
-                self.shadows.append(self.get_die_pos(row, col) + (0, 19))
+                value = int(state.values[row, col])
+                if value != EMPTY:
+                    animation_delay = None
+                    if (row, col) in visible:
+                        animation_delay = (row - first_row) * 5 \
+                            + (col - first_col) * 2 \
+                            + self.animation_rng.randint(0, 8)
+                    die = Dice(row, col, value, self.get_die_pos(row, col),
+                               animation_delay, images[value],
+                               self.animation_rng, self.dice_store)
+                    self.dice.append(die)
+                    self.grid.place(die)
 
     def spawn_score_display(self, pos: pg.math.Vector2, die_value: int,
                             points: int):
@@ -261,6 +443,7 @@ class Board(pg.sprite.Sprite):
             offset_x += SCORE_LETTER_WIDTHS[letter]
 
         self.score_displays.append({'counter': 60, 'image': image, 'pos': pos})
+        self.add_dirty_rect(pg.Rect(pos, image.get_size()).inflate(2, 2))
 
     def try_match_and_store_score(self, die: Dice, neighbor: Dice) -> int:
         from game import _get_avg_pos
@@ -269,9 +452,7 @@ class Board(pg.sprite.Sprite):
         positions = []
 
         if neighbor.value == die.value:
-            for n, die in enumerate(
-                self.get_matching_neighbors(
-                    matching_value = die.value, match=die)):
+            for n, die in enumerate(self.get_matching_neighbors(die)):
                 scoring_move['dice'].append(die.value)
                 positions.append(die.pos)
                 die.kill(delay=n)
@@ -282,15 +463,18 @@ class Board(pg.sprite.Sprite):
 
         return 1
 
-    def update(self, mouse_motion: bool, active_move: Move,
-               game_animation: bool):
+    def update(self, mouse_motion: bool, game_animation: bool):
+        """One tick of the simulation; nothing is drawn until draw()"""
         if mouse_motion and not game_animation:
             self.highlight_hovered_die()
 
-        for die in self.get_all_dice():
+        for die in list(self.grid.animating):  # Dice at rest don't change
+            drawn_rect = die.get_draw_rect()
             die.update()
+            self.add_dirty_rect(drawn_rect.union(die.get_draw_rect()))
 
             if not die.is_animating():
+                self.grid.stop_animating(die)
                 if die.slide_direction:
                     try:
                         coords = self.get_coords_in_direction(
@@ -306,31 +490,21 @@ class Board(pg.sprite.Sprite):
                 elif die.value == -1:
                     self.remove_die(die)
 
-            if not self.legal_move_exists:
-                if die.value:
-                    try:
-                        coords = self.get_coords_in_direction(
-                            die.row, die.col, active_move.axis,
-                            active_move.value)
-                        neighbor_die = self.get_die_from_coords(*coords)
-                        if neighbor_die:
-                            if neighbor_die.value == die.value > 0:  # Exclude
-                                    self.legal_move_exists = True    # 0 & -1
-                        else:
-                            self.legal_move_exists = True
-                    except IndexError:
-                        pass  # Edge of board
-
         if self.score_displays:
+            for score_display in self.score_displays:
+                if not score_display['counter']:
+                    self.add_dirty_rect(pg.Rect(
+                        score_display['pos'],
+                        score_display['image'].get_size()).inflate(2, 2))
             self.score_displays = [s for s in self.score_displays \
                                    if s['counter']]
             for score_display in self.score_displays:
                 score_display['counter'] -= 1
 
-        self.draw()
-
 
 class Info():
+    new_game_hitbox = pg.Rect(NEW_GAME_BTN_POS, NEW_GAME_BTN_SIZE)
+
     def __init__(self, sprite_sheet: SpriteSheet, font: pg.font.Font):
         self.sprite_sheet = sprite_sheet
 
@@ -338,36 +512,31 @@ class Info():
         self.font = font
         self.image = self.sprite_sheet.info_bg.copy()
 
-    @staticmethod
-    def count_dice_by_value(dice: list[Dice]) -> dict:
-        counts = {}
-        for die in dice:
-            if die.value > 0:
-                if die.value not in counts:
-                    counts[die.value] = 1
-                else:
-                    counts[die.value] += 1
-
-        return counts
+        self.drawn_rects = []
+        self.drawn_stats = None
 
     def try_click_new_game(self, mouse_pos: pg.math.Vector2) -> bool:
-        dims = pg.math.Vector2(66, 12)
-        topleft = pg.math.Vector2(34, 258)
-        new_game_poly = Polygon(
-            (topleft,
-             topleft + (dims.x, 0),
-             topleft + dims,
-             topleft + (0, dims.y))
-        )
-
-        mouse_pos_within_info = Point(mouse_pos - INFO_POS + (8, 8))
-        return new_game_poly.contains(mouse_pos_within_info)
+        mouse_pos_within_info = mouse_pos - INFO_POS + (8, 8)
+        return self.new_game_hitbox.collidepoint(mouse_pos_within_info)
 
     def update(self, score: int, level: int, moves: int, best: int,
-               dice: list[Dice]):
+               counts: list[int], bests: 'Bests | None' = None):
+        """{bests} are the all-time bests, shown up top if given"""
+        stats = (score, level, moves, best, tuple(counts), bests)
+        if stats == self.drawn_stats:  # Skip re-rendering text
+            self.drawn_rects = []
+            return
+        self.drawn_stats = stats
+        self.drawn_rects = [self.image.get_rect()]
+
         self.image.fill(self.color.black)
         self.image.blit(self.sprite_sheet.info_bg, (0, 0))
 
+        if bests:
+            image = self.font.render(f'HI {bests.score}  LV {bests.level}',
+                                     False, self.color.ice)
+            self.image.blit(image, (128 - image.get_width(), 6))
+
         for n, text in enumerate([score, level, moves]):
             image = self.font.render(str(text), False, self.color.white)
             self.image.blit(image, (128 - image.get_width(), 33 + n * 26))
@@ -375,13 +544,16 @@ class Info():
         best_img = self.font.render(f'{best}     dice', False, self.color.white)
         self.image.blit(best_img, (128 - best_img.get_width(), 111))
 
-        self.image.blit(self.sprite_sheet.new_game_button, (34, 258))
+        self.image.blit(self.sprite_sheet.new_game_button, NEW_GAME_BTN_POS)
 
         # Last minute hacky stuff here
         horizontal_space = self.image.get_width() - 8
-        counts = self.count_dice_by_value(dice)
-        for value in counts:
-            num_dice_by_value = counts[value]
+        for value in range(1, 7):
+            # Past one die per pixel, more wouldn't show (big boards)
+            num_dice_by_value = min(counts[value],
+                                    horizontal_space - int(MINI_DIE_SIZE.x))
+            if not num_dice_by_value:
+                continue
             horizontal_slice = min(horizontal_space // num_dice_by_value, MINI_DIE_SIZE.x + 2)
             for n in range(num_dice_by_value):
                 coords = (horizontal_slice * n + 8, (MINI_DIE_SIZE.y + 8) * value + 131)
@@ -6,10 +6,13 @@ BANNER_POS         = pg.math.Vector2(63, 90)
 BOARD_POS          = pg.math.Vector2(8, 8)
 BTN_POS_HIGH       = pg.math.Vector2(108, 120)
 BTN_POS_LOW        = pg.math.Vector2(108, 150)
+BTN_SIZE           = pg.math.Vector2(105, 23)
 DIE_SPRITE_SIZE    = pg.math.Vector2(32, 36)
 INFO_POS           = BOARD_POS + (328, 28)
 MINI_DIE_SIZE      = pg.math.Vector2(11, 10)
 MOVE_QUEUE_SIZE    = pg.math.Vector2(480, 72)
+NEW_GAME_BTN_POS   = pg.math.Vector2(34, 258)
+NEW_GAME_BTN_SIZE  = pg.math.Vector2(66, 12)
 NEXT_BADGE_POS     = pg.math.Vector2(212, 5)
 SCORE_LETTER_SIZE  = pg.math.Vector2(12, 10)
 SCREEN_SIZE        = pg.math.Vector2(960, 640)
@@ -17,8 +20,17 @@ SELECTION_SIZE     = pg.math.Vector2(32, 17)
 TILE_SIZE          = pg.math.Vector2(32, 16)
 
 BASE_SCORE         = 6
+EMPTY              = -2  # Grid value for a space with no die
+FPS                = 60  # Default frame cap; see main.main()
+HINT_READY         = pg.event.custom_type()  # Posted by hints.HintWorker
+MAX_FRAME_TICKS    = 5  # Past this, slow down rather than fall further behind
+REPLAY_DELAY       = 10  # Ticks to wait between moves when replaying
+SCROLL_SPEED       = 8  # Board pixels per tick, for boards bigger than it
+TICK_RATE          = 30  # Simulation steps per second; animations assume it
 TILE_GAP           = 2
 
+DIE_HITBOX = ((0, 8), (15, 0), (31, 8), (15, 16))  # Top face, from die.pos
+
 MOVES = [
     ('se', 'row', 1),
     ('nw', 'row', -1),
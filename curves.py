@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=256)
+def get_curve(easing: str, num_frames: int,
+              distance: tuple[float, float]) -> np.ndarray:
+    """
+    Returns a read-only (num_frames + 1, 2) array of offsets from the
+    start of a tween: pytweening.{easing}(n / num_frames) * {distance}.
+    Dice and the move queue reuse the same few curves over and over, so
+    each one is only computed once.
+    """
+    import pytweening  # Only needed the first time each curve is built
+
+    ease = getattr(pytweening, easing)
+    progress = np.array([ease(n / num_frames) for n in range(num_frames + 1)])
+
+    curve = progress[:, None] * np.array(distance, dtype=float)
+    curve.flags.writeable = False
+    return curve
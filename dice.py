@@ -1,57 +1,145 @@
-from random import randint
+import random
 
+import numpy as np
 import pygame as pg
-import pytweening
 
-from const import Color
+from const import DIE_SPRITE_SIZE
+from curves import get_curve
 
 
-class Dice(pg.sprite.Sprite):
+# (image attribute, number of frames) shown after a die's kill delay
+KILL_PHASES = (('flash_solid', 2), ('flash_wireframe', 2), ('flash_solid', 2))
+
+
+def _to_vector(entry: np.ndarray) -> pg.math.Vector2:
+    return pg.math.Vector2(entry[0], entry[1])
+
+
+class DiceStore():
+    fields = (  # (name, dtype, shape of each die's entry)
+        ('pos',      np.float64, (2,)),
+        ('prev_pos', np.float64, (2,)),
+        ('anchor',   np.float64, (2,)),
+        ('z_index',  np.float64, ()),
+    )
+
+    def __init__(self, capacity: int = 64):
+        """
+        Struct-of-arrays storage for the dice fields that the board reads
+        for many dice at once (positions to draw, draw order): one NumPy
+        array per field in {fields}, with an entry per die (see Dice).
+        Grows as needed. Entries are never reused, since a board deals
+        all of its dice at once.
+        """
+        self.capacity = max(1, capacity)
+        self.size     = 0
+
+        for name, dtype, shape in self.fields:
+            setattr(self, name, np.zeros((self.capacity, *shape), dtype))
+
+    def add(self) -> int:
+        """Index of a new, zeroed entry"""
+        if self.size == self.capacity:
+            self.grow()
+        self.size += 1
+
+        return self.size - 1
+
+    def grow(self):
+        self.capacity *= 2
+        for name, dtype, shape in self.fields:
+            array = np.zeros((self.capacity, *shape), dtype)
+            array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+
+
+class _Field():
+    def __init__(self, cast: type = int):
+        """A Dice attribute kept in the same-named array of its store"""
+        self.cast = cast
+        self.name = None  # Set by __set_name__()
+
+    def __get__(self, die: 'Dice | None', owner: type):
+        if die is None:
+            return self
+
+        return self.cast(getattr(die.store, self.name)[die.index])
+
+    def __set__(self, die: 'Dice', value):
+        getattr(die.store, self.name)[die.index] = value
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+
+class Dice():
+    __slots__ = ('col', 'curve', 'curve_delay', 'current_frame',
+                 'fade_counter', 'freeze_z_index', 'ghost', 'grid', 'images',
+                 'index', 'kill_start', 'num_kill_frames', 'offset_step',
+                 'rng', 'row', 'slide_direction', 'store', 'value')
+
+    pos      = _Field(_to_vector)  # Pixel position (where to draw)
+    prev_pos = _Field(_to_vector)  # {pos} before the last update()
+    anchor   = _Field(_to_vector)  # Where {curve} offsets start
+    z_index  = _Field(float)
+
     def __init__(self, row: int, col: int, value: int, pos: pg.math.Vector2,
-                 animation_delay: int, images: dict):
-        pg.sprite.Sprite.__init__(self)
+                 animation_delay: int | None, images: dict,
+                 rng: random.Random = random, store: DiceStore | None = None):
         """
         For {value}, 0 means a "rock" die;
         -1 means "kill me once I'm done animating".
         Everything else is just the number of dimples showing.
-        """
 
-        self.row         = row
-        self.col         = col
-        self.value       = value
-        self.pos         = pos  # Pixel position (where to draw)
+        If {animation_delay} is None, the die starts in place rather
+        than dropping in.
 
-        self.ghost_image     = images['ghost']
-        self.image           = images['image']
-        self.fade_counter    = 255
-        self.flash_solid     = images['flash_solid']
-        self.flash_wireframe = images['flash_wireframe']
+        A die's positions live in {store} (its own, if not given), where
+        the board reads them in bulk. The scalars read die by die every
+        tick stay plain attributes, as a lookup in an array costs several
+        times more. {images} are sprite sheet surfaces, shared by every
+        die of the same value.
+        """
+        self.store = DiceStore(1) if store is None else store
+        self.index = self.store.add()
 
-        self.animation_frames = []  # List of pg.Surface
-        self.current_frame    = 0
-        self.freeze_z_index   = False
-        self.ghost            = False
-        self.pre_kill_pos     = pos.copy() + (0, 19)
-        self.rect             = self.image.get_rect()
-        self.slide_direction  = None
-        self.offset_step      = 0
-        self.offsets          = []  # List of pg.math.Vector2
-        self.z_index          = 0
+        self.col             = col
+        self.curve           = None  # Offsets from {anchor}, per tick
+        self.curve_delay     = 0  # Frames to hold the first offset
+        self.current_frame   = 0  # Frame of the kill animation, if any
+        self.fade_counter    = 255
+        self.freeze_z_index  = False
+        self.ghost           = False
+        self.grid            = None  # Set by Grid.place()
+        self.images          = images
+        self.kill_start      = 0  # Frame at which the kill flash starts
+        self.num_kill_frames = 0
+        self.offset_step     = 0
+        self.rng             = rng  # Only used for animations
+        self.row             = row
+        self.slide_direction = None
+        self.value           = value
 
-        self.color   = Color()
+        self.pos      = pos
+        self.prev_pos = pos
+        self.anchor   = pos
+        self.z_index  = pos.y
 
-        self.build_drop_animation(animation_delay)
+        if animation_delay is not None:
+            self.build_drop_animation(animation_delay)
 
     def __repr__(self) -> str:
         return f'Die {self.value} @ (r{self.row}, c{self.col})'
 
     def animate(self):
-        if self.offsets and self.offset_step < len(self.offsets) - 1:
+        if self.curve is not None and \
+                self.offset_step < self.curve_delay + len(self.curve) - 1:
             self.offset_step += 1
             if self.ghost:
                 self.fade_counter -= 7
         else:
-            self.offsets = []
+            self.curve = None
+            self.curve_delay = 0
             self.offset_step = 0
             self.freeze_z_index = False
             self.z_index = self.pos.y
@@ -59,103 +147,127 @@ class Dice(pg.sprite.Sprite):
                 self.fade_counter = 0
 
         if self.current_frame:
-            if self.current_frame < len(self.animation_frames) - 1:
+            if self.current_frame < self.num_kill_frames - 1:
                 self.current_frame += 1
             else:
                 self.current_frame = 0
-                self.animation_frames = []
+                self.num_kill_frames = 0
                 self.build_flyaway_animation()
                 self.ghost = True
 
     def build_drop_animation(self, animation_delay: int):
-        from game import _convert_raw_positions_to_offsets
-
-        num_frames = 40 + randint(-4, 4)
-        delay = animation_delay
+        num_frames = 40 + self.rng.randint(-4, 4)
         starting_y = -320
 
-        raw_positions = [
-            pytweening.easeInQuad((n / num_frames)) * starting_y \
-                for n in range(num_frames + 1)
-        ]
-        raw_positions += [starting_y for _ in range(delay)]
-        raw_positions.reverse()
-        raw_positions = [pg.math.Vector2(0, y) for y in raw_positions]
-        self.offsets = _convert_raw_positions_to_offsets(
-            raw_positions, start_value=pg.math.Vector2(0, starting_y))
+        # Falls from {starting_y} by running the ease-in curve backwards
+        curve = get_curve('easeInQuad', num_frames, (0, starting_y))
+        self.set_curve(curve[::-1], delay=animation_delay)
         self.z_index = self.pos.y
         self.freeze_z_index = True
 
-    def build_flyaway_animation(self):
-        from game import _convert_raw_positions_to_offsets
+        # Start up top, in case it's drawn before its first update()
+        self.set_pos()
+        self.prev_pos = self.pos
 
+    def build_flyaway_animation(self):
         num_frames = self.fade_counter // 7
-        target_y = randint(-66, -50)
-        raw_positions = [
-            pytweening.easeInQuad((n / num_frames)) * target_y \
-                for n in range(num_frames + 1)
-        ]
-        raw_positions = [pg.math.Vector2(0, y) for y in raw_positions]
-        self.offsets = _convert_raw_positions_to_offsets(raw_positions)
+        target_y = self.rng.randint(-66, -50)
+
+        self.set_curve(get_curve('easeInQuad', num_frames, (0, target_y))[1:])
         self.z_index = self.pos.y
         self.freeze_z_index = True
 
     def build_slide_animation(self, start_pos: tuple[int], end_pos: tuple[int]):
-        from game import _convert_raw_positions_to_offsets
-
-        raw_positions = []
-        for x, y in pytweening.iterLinear(
-            start_pos[0], start_pos[1], end_pos[0], end_pos[1], 0.1):
-            raw_positions.append(pg.math.Vector2(x, y))
-
-        self.offsets = _convert_raw_positions_to_offsets(raw_positions)
+        distance = (end_pos[0] - start_pos[0], end_pos[1] - start_pos[1])
+        self.set_curve(get_curve('linear', 10, distance)[1:], anchor=start_pos)
 
     def end_slide(self):
         self.slide_direction = None
 
-    def get_height(self) -> float:
-        if self.offsets:
-            return self.offsets[self.offset_step]
-        else:
-            return 0
+    def get_draw_pos(self, alpha: float = 1.0) -> pg.math.Vector2:
+        """
+        Where to draw, {alpha} of the way from {prev_pos} to {pos}.
+        Dice that aren't following a curve are always drawn at {pos}.
+        """
+        if alpha == 1.0 or self.curve is None:
+            return self.pos
+
+        return self.prev_pos.lerp(self.pos, alpha)
+
+    def get_draw_rect(self, alpha: float = 1.0) -> pg.Rect:
+        """Area covered by get_image(), padded for sub-pixel positions"""
+        return pg.Rect(self.get_draw_pos(alpha), DIE_SPRITE_SIZE).inflate(2, 2)
 
     def get_image(self) -> pg.Surface:
         if self.current_frame:
-            return self.animation_frames[self.current_frame]
+            return self.get_kill_image()
         elif self.ghost:
-            self.ghost_image.set_alpha(self.fade_counter)
-            return self.ghost_image
+            self.images['ghost'].set_alpha(self.fade_counter)
+            return self.images['ghost']
         else:
-            return self.image
+            return self.images['image']
+
+    def get_kill_image(self) -> pg.Surface:
+        frame = self.current_frame - self.kill_start
+        if frame < 0:
+            return self.images['image']
+
+        for name, num_frames in KILL_PHASES:
+            if frame < num_frames:
+                return self.images[name]
+            frame -= num_frames
 
     def is_animating(self) -> bool:
-        return self.offsets or self.animation_frames
+        return self.curve is not None or bool(self.current_frame)
 
     def kill(self, delay: int):
         self.value = -1
+        if self.grid is not None:
+            self.grid.update_value(self)
+            self.grid.start_animating(self)
 
-        self.animation_frames  = [self.image for _ in range(delay * 3)]
-        self.animation_frames += [self.flash_solid for _ in range(2)]
-        self.animation_frames += [self.flash_wireframe for _ in range(2)]
-        self.animation_frames += [self.flash_solid for _ in range(2)]
+        self.kill_start = delay * 3
+        self.num_kill_frames = \
+            self.kill_start + sum(num_frames for _, num_frames in KILL_PHASES)
 
         self.current_frame = 1
 
     def set_coords(self, row: int, col: int):
+        if self.grid is not None:
+            self.grid.move(self, row, col)
+
         self.row = row
         self.col = col
 
+    def set_curve(self, curve: np.ndarray, anchor: tuple[int] | None = None,
+                  delay: int = 0):
+        self.anchor = self.pos if anchor is None else anchor
+        self.prev_pos = self.pos  # Don't interpolate from a stale position
+        self.curve = curve
+        self.curve_delay = delay
+        self.offset_step = 0
+
+        if self.grid is not None:
+            self.grid.start_animating(self)
+
     def set_pos(self):
-        if self.offsets:
-            self.pos += self.offsets[self.offset_step]
+        """
+        Positions are read straight off the curve rather than summed from
+        per-frame deltas, so rounding errors can't pile up
+        """
+        if self.curve is not None:
+            store, index = self.store, self.index
+            store.pos[index] = store.anchor[index] + self.curve[
+                max(0, self.offset_step - self.curve_delay)]
 
             if not self.freeze_z_index:
-                self.z_index = self.pos.y
+                store.z_index[index] = store.pos[index, 1]
 
     def slide(self, start_pos: tuple[int], end_pos: tuple[int], move: 'Move'):
         self.build_slide_animation(start_pos, end_pos)
         self.slide_direction = {'axis': move.axis, 'value': move.value}
 
     def update(self):
+        self.store.prev_pos[self.index] = self.store.pos[self.index]
         self.set_pos()
         self.animate()
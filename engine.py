@@ -0,0 +1,371 @@
+import random
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from const import BASE_SCORE, EMPTY, MOVES
+
+
+MoveResult = namedtuple('MoveResult', ['status', 'destination', 'matched',
+                                       'points'])
+MoveState  = namedtuple('MoveState', ['name', 'axis', 'value'])
+
+
+def _explore(values: memoryview, neighbors: tuple[tuple[int]], start: int,
+             visited: list[int], stamp: int) -> list[int]:
+    """
+    Breadth-first flood fill over flat indices; {region} doubles as the
+    queue, so nothing is allocated per step. A space has been visited if
+    it holds {stamp} in {visited}.
+    """
+    value = values[start]
+    visited[start] = stamp
+    region = [start]
+    for index in region:
+        for neighbor in neighbors[index]:
+            if visited[neighbor] != stamp and values[neighbor] == value:
+                visited[neighbor] = stamp
+                region.append(neighbor)
+
+    return region
+
+
+def _get_rotated_index(index: int) -> int:
+    return 1 if index == 3 else index + 1
+
+
+def _get_shift_slices(size: int, step: int) -> tuple[slice]:
+    """Slices pairing each space with the one {step} spaces further on"""
+    if step > 0:
+        return slice(0, size - step), slice(step, size)
+    elif step < 0:
+        return slice(-step, size), slice(0, size + step)
+    return slice(0, size), slice(0, size)
+
+
+def _get_step(move: 'MoveState') -> tuple[int]:
+    return (move.value, 0) if move.axis == 'row' else (0, move.value)
+
+
+class BoardState():
+    def __init__(self, num_rows: int = 8, num_cols: int = 8,
+                 values: np.ndarray | None = None):
+        """
+        {values} holds one int8 per space: EMPTY, 0 for a rock die,
+        1-6 for the number of dimples, or -1 for a die that has been
+        matched but not yet removed (renderer only).
+
+        Flood fills mark the spaces they reach in {visited} with a fresh
+        {visit_stamp} each, so the buffer is allocated once (on the
+        first fill) and never cleared.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+
+        if values is None:
+            values = np.full((num_rows, num_cols), EMPTY, dtype=np.int8)
+        self.values = values
+
+        self.visit_stamp = 0
+        self.visited     = None
+
+    def __repr__(self) -> str:
+        return f'BoardState {self.num_rows}x{self.num_cols}'
+
+    def contains(self, row: int, col: int) -> bool:
+        return -1 < row < self.num_rows and -1 < col < self.num_cols
+
+    def copy(self) -> 'BoardState':
+        return BoardState(self.num_rows, self.num_cols, self.values.copy())
+
+    def get_flat_values(self) -> memoryview:
+        """{values} by flat index, read in place rather than copied"""
+        return memoryview(self.values.reshape(-1))
+
+    def next_visit_stamp(self) -> int:
+        if self.visited is None:
+            self.visited = [0] * (self.num_rows * self.num_cols)
+        self.visit_stamp += 1
+        return self.visit_stamp
+
+
+class QueueState():
+    def __init__(self, rng: random.Random = random, lookahead: int = 3):
+        """
+        {moves}[0] is the active move; the rest are the upcoming moves
+        shown in the queue.
+        """
+        self.rng   = rng
+        self.moves = []
+
+        while len(self.moves) < lookahead + 1:
+            self.spawn_move()
+
+    def advance(self):
+        self.spawn_move()
+        self.moves.pop(0)
+
+    def get_active_move(self) -> MoveState:
+        return self.moves[0]
+
+    def spawn_move(self):
+        self.moves.append(
+            roll_move([m.name for m in self.moves], rng=self.rng))
+
+
+class GameState():
+    def __init__(self, board: BoardState | None = None,
+                 queue: QueueState | None = None, level: int = 1,
+                 rng: random.Random = random):
+        self.board     = roll_board(rng=rng) if board is None else board
+        self.level     = level
+        self.most_dice = 0
+        self.num_moves = 0
+        self.queue     = QueueState(rng) if queue is None else queue
+        self.score     = 0
+
+    def apply_move(self, row: int, col: int) -> MoveResult:
+        result = apply_move(self.board, row, col,
+                            self.queue.get_active_move(), self.level)
+        if result.status == 0:
+            self.queue.advance()
+            self.num_moves += 1
+            if result.matched:
+                self.score += result.points
+                self.most_dice = max(self.most_dice, len(result.matched))
+
+        return result
+
+    def check_win(self) -> int:
+        return check_win(self.board, self.queue.get_active_move())
+
+    def legal_moves(self) -> list[tuple[int]]:
+        return legal_moves(self.board, self.queue.get_active_move())
+
+
+def apply_move(board: BoardState, row: int, col: int, move: 'MoveState',
+               level: int = 1) -> MoveResult:
+    """
+    Plays the die at (row, col) in {move} direction, removing any
+    matched dice from {board}. Status codes match Game.execute_move:
+        0: The die slid and/or bumped a matching die
+        1: The die can't move (blocked, or a rock)
+        2: The die is at the edge of the board
+    """
+    value = int(board.values[row, col])
+    if value < 1:
+        return MoveResult(1, (row, col), [], 0)
+
+    status, destination = get_move_outcome(board, row, col, move)
+    if status:
+        return MoveResult(status, destination, [], 0)
+
+    if destination != (row, col):
+        board.values[row, col] = EMPTY
+        board.values[destination] = value
+
+    matched = get_bumped_region(board, *destination, move)
+    for coords in matched:
+        board.values[coords] = EMPTY
+
+    points = score(len(matched), value, level) if matched else 0
+    return MoveResult(0, destination, matched, points)
+
+
+def check_win(board: BoardState, move: 'MoveState') -> int:
+    """See get_win_status() for return codes"""
+    counts = np.bincount(board.values[board.values > 0], minlength=7)
+    return get_win_status(counts.tolist(), has_legal_move(board, move))
+
+
+def get_bumped_region(board: BoardState, row: int, col: int,
+                      move: 'MoveState') -> list[tuple[int]]:
+    """Dice matched by the die at (row, col) bumping its neighbor"""
+    d_row, d_col = _get_step(move)
+    if not board.contains(row + d_row, col + d_col):
+        return []
+
+    value = board.values[row, col]
+    if value < 1 or board.values[row + d_row, col + d_col] != value:
+        return []
+
+    return get_matching_region(board, row, col)
+
+
+def get_destination_coords(board: BoardState, row: int, col: int,
+                           move: 'MoveState') -> tuple[int]:
+    """
+    Checks spaces in {move} direction until it finds and returns coords
+    (row, col) for:
+        1. The space adjacent to another die, or
+        2. The last space on the board in {move} direction
+    """
+    d_row, d_col = _get_step(move)
+    while board.contains(row + d_row, col + d_col) \
+            and board.values[row + d_row, col + d_col] == EMPTY:
+        row += d_row
+        col += d_col
+
+    return row, col
+
+
+def get_legal_mask(board: BoardState, move: 'MoveState') -> np.ndarray:
+    """Bool array of the dice that can slide or match in {move} direction"""
+    return get_shifted_legal_mask(board.values, *_get_step(move))
+
+
+def get_matching_region(board: BoardState, row: int,
+                        col: int) -> list[tuple[int]]:
+    """Coords of every die connected to (row, col) with the same value"""
+    num_cols = board.num_cols
+    stamp = board.next_visit_stamp()
+    region = _explore(board.get_flat_values(),
+                      get_neighbor_table(board.num_rows, num_cols),
+                      row * num_cols + col, board.visited, stamp)
+    return [divmod(index, num_cols) for index in region]
+
+
+def get_move_outcome(board: BoardState, row: int, col: int,
+                     move: 'MoveState') -> tuple[int, tuple[int]]:
+    """
+    Returns (status, destination) for playing the die at (row, col)
+    without changing {board}; see apply_move() for status codes.
+    """
+    d_row, d_col = _get_step(move)
+    if not board.contains(row + d_row, col + d_col):
+        return 2, (row, col)
+
+    neighbor_value = board.values[row + d_row, col + d_col]
+    if neighbor_value == EMPTY:
+        return 0, get_destination_coords(board, row, col, move)
+    elif neighbor_value == board.values[row, col]:
+        return 0, (row, col)
+
+    return 1, (row, col)
+
+
+@lru_cache
+def get_neighbor_table(num_rows: int, num_cols: int) -> tuple[tuple[int]]:
+    """
+    Flat indices (row * num_cols + col) of each space's on-board
+    neighbors, in nw, ne, se, sw order
+    """
+    table = []
+    for row in range(num_rows):
+        for col in range(num_cols):
+            table.append(tuple(
+                r * num_cols + c for r, c in
+                ((row - 1, col), (row, col + 1), (row + 1, col), (row, col - 1))
+                if -1 < r < num_rows and -1 < c < num_cols))
+
+    return tuple(table)
+
+
+def get_win_status(counts: list[int], legal_move_exists: bool) -> int:
+    """
+    Takes the number of dice per value (index 0 for rocks) and whether
+    the active move can be played. Returns the same codes as
+    Game.check_win:
+        0: At least 1 possible match remains (game continues)
+        1: Some dice remain, but no possible moves (misson complete)
+        2: No non-rock dice remain (mission accomplished)
+        3: No legal moves remain (game over)
+    """
+    if not any(counts[1:]):
+        return 2
+
+    if not legal_move_exists:
+        return 3
+
+    if any(count > 1 for count in counts[1:]):
+        return 0
+
+    return 1
+
+
+def get_shifted_legal_mask(values: np.ndarray, d_row: int,
+                           d_col: int) -> np.ndarray:
+    """
+    Legal mask for any array whose last two axes are (row, col), so a
+    whole batch of boards can be checked at once
+    """
+    num_rows, num_cols = values.shape[-2:]
+    src_rows, dst_rows = _get_shift_slices(num_rows, d_row)
+    src_cols, dst_cols = _get_shift_slices(num_cols, d_col)
+    src = values[..., src_rows, src_cols]
+    dst = values[..., dst_rows, dst_cols]
+
+    mask = np.zeros(values.shape, dtype=bool)
+    mask[..., src_rows, src_cols] = (src > 0) & ((dst == EMPTY) | (dst == src))
+    return mask
+
+
+def has_legal_move(board: BoardState, move: 'MoveState') -> bool:
+    return bool(get_legal_mask(board, move).any())
+
+
+def label_components(board: BoardState) -> tuple[np.ndarray, list[int]]:
+    """
+    Labels every group of connected same-value dice in one sweep (rocks
+    and empty spaces get -1). Returns the labels, shaped like
+    {board}.values, and the size of each group by label.
+    """
+    values = board.get_flat_values()
+    neighbors = get_neighbor_table(board.num_rows, board.num_cols)
+    stamp = board.next_visit_stamp()  # One for the whole sweep
+    visited = board.visited
+    labels = [-1] * len(values)
+    sizes = []
+
+    for start, value in enumerate(values):
+        if value > 0 and visited[start] != stamp:
+            region = _explore(values, neighbors, start, visited, stamp)
+            for index in region:
+                labels[index] = len(sizes)
+            sizes.append(len(region))
+
+    return np.array(labels, dtype=np.int32).reshape(board.values.shape), sizes
+
+
+def legal_moves(board: BoardState, move: 'MoveState') -> list[tuple[int]]:
+    return [(r, c) for r, c in np.argwhere(
+        get_legal_mask(board, move)).tolist()]
+
+
+def make_rngs(seed: int) -> tuple[random.Random]:
+    """
+    Returns the (rules, animation) generators for a game. Game deals its
+    boards and moves from the first, so a GameState built on it with the
+    same seed plays out the same game.
+    """
+    rng = random.Random(seed)
+    return rng, random.Random(rng.getrandbits(32))
+
+
+def roll_board(num_rows: int = 8, num_cols: int = 8,
+               rng: random.Random = random) -> BoardState:
+    board = BoardState(num_rows, num_cols)
+    for row in range(num_rows):
+        for col in range(num_cols):
+            if rng.randint(1, 6) > 1:  # ~17% of spaces should be empty
+                board.values[row, col] = rng.randint(0, 6)
+
+    return board
+
+
+def roll_move(recent: list[str], rng: random.Random = random) -> MoveState:
+    """Picks a move, given the names of the moves already queued"""
+    index = rng.randint(0, 3)
+
+    # Prevent 4-in-a-row of the same move type
+    if len(recent) >= 3 and len(set(recent[-3:])) == 1 \
+            and recent[-1] == MOVES[index][0]:
+        index = _get_rotated_index(index)
+
+    return MoveState(*MOVES[index])
+
+
+def score(num_dice: int, die_value: int, level: int) -> int:
+    return BASE_SCORE * num_dice * 2 + die_value * level
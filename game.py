@@ -1,53 +1,100 @@
+import random
+
 from pathlib import Path
-from random import randint
-from statistics import mean
 
 import pygame as pg
 
+import engine
+
 from board import Board, Info
-from const import BASE_SCORE
+from const import BOARD_POS, INFO_POS, MOVES
 from dice import Dice
 from image import SpriteSheet
-from move_queue import Move, Queue
+from move_queue import Queue
+from replay import NEW_GAME, NEXT_LEVEL, Record, ReplayError, ReplayLog
 
 
-def _convert_raw_positions_to_offsets(
-    raw_positions: list[pg.math.Vector2],
-    start_value: pg.math.Vector2 | None = None) -> list[pg.math.Vector2]:
-    offsets = [] if start_value is None else [start_value]
+def _get_avg_pos(positions: list[pg.math.Vector2]) -> pg.math.Vector2:
+    return sum(positions, pg.math.Vector2(0, 0)) / len(positions)
 
-    for n in range(1, len(raw_positions)):
-        offsets.append(raw_positions[n] - raw_positions[n - 1])
 
-    return offsets
+def _sort_by_z_index(d: Dice) -> int:
+    return d.pos.y
 
 
-def _get_avg_pos(positions: list[pg.math.Vector2]) -> pg.math.Vector2:
-    x, y = mean([p.x for p in positions]), mean([p.y for p in positions])
-    return pg.math.Vector2(x, y)
+class Game():
+    def __init__(self, base_path: Path, seed: int | None = None,
+                 profile: 'StartupProfile | None' = None, num_rows: int = 8,
+                 num_cols: int = 8, hints: bool = False,
+                 pack: 'LevelPack | None' = None, pack_start: int = 0,
+                 scores: 'ScoreStore | None' = None):
+        """
+        {rng} drives the rules (board layout and move queue) and
+        {animation_rng} the purely cosmetic randomness, so the same seed
+        always deals the same boards and moves however dice animate.
 
+        Every choice the player makes is recorded in {replay}, which
+        play_record() can play back.
 
-def _roll_d6() -> int:
-    return randint(1, 6)
+        With {hints}, a HintWorker starts looking for the best die to play
+        whenever the board or active move changes, once any slide has
+        landed; its HINT_READY events go to receive_hint().
 
+        Given a {pack}, levels are played from it in order, starting with
+        record {pack_start}, each with its own queue; the board size is
+        the pack's.
 
-def _sort_by_z_index(d: Dice) -> int:
-    return d.pos.y
+        Given {scores}, each game is saved there as a session from its
+        first move on, along with how each level went; the all-time bests
+        show in the info panel.
 
+        If given, {profile} is marked after each of the slower steps.
+        """
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.rng, self.animation_rng = engine.make_rngs(self.seed)
+        self.pack       = pack
+        self.pack_start = pack_start
+        if pack:
+            num_rows, num_cols = pack.num_rows, pack.num_cols
+        self.replay = ReplayLog(self.seed, num_rows, num_cols)
 
-class Game():
-    def __init__(self, base_path: Path):
-        self.sprite_sheet = SpriteSheet(base_path)
-        self.board        = Board(self.sprite_sheet, base_path)
-        self.info         = Info(self.sprite_sheet,
-            pg.font.Font(base_path / 'assets' / 'kart.ttf', 14))
         self.level        = 1
         self.most_dice    = 0
-        self.move_queue   = Queue(self.sprite_sheet)
+        self.num_cols     = num_cols
         self.num_moves    = 0
+        self.num_rows     = num_rows
         self.paused       = False
         self.score        = 0
 
+        self.level_start_score = 0  # {score} when this level started
+        self.scores            = scores
+        self.session_id        = None  # Until the game's first move
+        self.session_seed      = None if pack else self.seed  # Deals this game
+
+        self.hint            = None  # Coords of the die to play, once found
+        self.hint_generation = 0  # Of the search {hint} is waiting on
+        self.hint_outdated   = False  # Search again once the board settles
+        self.hint_wanted     = False  # Show {hint} as soon as it can be
+        self.hints           = None
+        if hints:
+            from hints import HintWorker  # Loads the solver, so only if used
+            self.hints = HintWorker(num_rows, num_cols)
+
+        self.sprite_sheet = SpriteSheet(base_path)
+        if profile:
+            profile.mark('sprite sheet')
+        self.new_board()
+        if profile:
+            profile.mark('board')
+        self.info = Info(self.sprite_sheet,
+                         pg.font.Font(base_path / 'assets' / 'kart.ttf', 14))
+        if profile:
+            profile.mark('info')
+        self.move_queue = self.new_queue()
+        if profile:
+            profile.mark('move queue')
+        self.request_hint()
+
     def check_best_move(self, num_dice: int):
         self.most_dice = max(self.most_dice, num_dice)
 
@@ -59,27 +106,10 @@ class Game():
             2: No non-rock dice remain (mission accomplished)
             3: No legal moves remain (game over)
         """
-        if not self.board.legal_move_exists:
-            return 3
-
-        counts = [0] * 7
-        for die in self.board.get_all_dice():
-            try:
-                counts[die.value] += 1
-            except IndexError:
-                raise RuntimeError(f'IndexError from {die}')
-
-        try:
-            counts.pop(0)  # Ignore "rock" dice
-            if not sum(counts):
-                return 2
-        except IndexError:
-            return 2
-
-        if any([c > 1 for c in counts]):
+        if self.is_animating():  # Let slides and matches settle first
             return 0
 
-        return 1
+        return self.board.grid.check_win(self.move_queue.get_active_move())
 
     def choose_button(self):
         button_index = self.board.choose_button()
@@ -97,61 +127,56 @@ class Game():
         self.board.choose_die_under_mouse()
         if self.board.chosen_die:
             if self.board.chosen_die.value:   # Can't move rock dice
-                status = self.execute_move(self.board.chosen_die)
-                if status == 0:  # Successful move
-                    self.move_queue.advance()
-                    self.num_moves += 1
-                    self.board.legal_move_exists = False
+                self.play_move(self.board.chosen_die)
 
     def execute_move(self, die: Dice) -> int:
-        """Main game logic"""
+        """Main game logic; see engine.apply_move() for status codes"""
         self.board.show_highlight = 0
 
-        try:                # Match with bumped neighbor
-            coords = self.board.get_coords_in_direction(
-                die.row, die.col, self.move_queue.get_active_move().axis,
-                self.move_queue.get_active_move().value)
-            neighbor_die = self.board.get_die_from_coords(*coords)
-            if neighbor_die:
-                return self.board.try_match_and_store_score(die, neighbor_die)
-            else:           # Slide
-                target_coords = self.get_destination_coords(
-                    die, move=self.move_queue.get_active_move())
-                start_pos = self.board.get_die_pos(die.row, die.col)
-                end_pos = self.board.get_die_pos(*target_coords)
-                die.set_coords(*target_coords)
-                die.slide(start_pos, end_pos, self.move_queue.get_active_move())
-                return 0
-        except IndexError:  # At edge of board
-            return 2
-
-    def get_destination_coords(self, die: Dice, move: Move) -> tuple[int]:
-        """
-        Checks spaces along {axis} in {move.value} direction until
-        it finds and returns coords (row, col) for:
-            1. The space adjacent to another die, or
-            2. The last space on the board in {move.value} direction
-            along {axis}
-        """
-        empty_coords = (die.row, die.col)
-
-        try:
-            coords = self.board.get_coords_in_direction(
-                die.row, die.col, move.axis, move.value)
-            blocker = self.board.get_die_from_coords(*coords)
-        except IndexError:  # Off the edge of the board
-            return empty_coords
-
-        try:
-            while not blocker:
-                empty_coords = coords
-                coords = self.board.get_coords_in_direction(
-                    coords[0], coords[1], move.axis, move.value)
-                blocker = self.board.get_die_from_coords(*coords)
-        except IndexError:
-            return empty_coords
-
-        return empty_coords
+        move = self.move_queue.get_active_move()
+        status, target_coords = engine.get_move_outcome(
+            self.board.grid, die.row, die.col, move)
+        if status:
+            return status
+
+        if target_coords == (die.row, die.col):  # Match with bumped neighbor
+            neighbor_die = self.board.get_neighbor_in_direction(die, move)
+            return self.board.try_match_and_store_score(die, neighbor_die)
+        else:                                    # Slide
+            start_pos = self.board.get_die_pos(die.row, die.col)
+            end_pos = self.board.get_die_pos(*target_coords)
+            die.set_coords(*target_coords)
+            die.slide(start_pos, end_pos, move)
+            return 0
+
+    def draw(self, alpha: float = 1.0, profile: 'FrameProfile | None' = None):
+        """
+        Redraws whatever changed since the last draw(), with animations
+        {alpha} of the way from the previous tick to the latest one.
+        If given, {profile} is marked after each component draws.
+        """
+        self.board.draw(alpha)
+        if profile:
+            profile.mark('board draw')
+        self.move_queue.draw(alpha)
+        if profile:
+            profile.mark('queue draw')
+        self.info.update(self.score, self.level, self.num_moves, self.most_dice,
+                         self.board.grid.counts,
+                         self.scores.bests if self.scores else None)
+        if profile:
+            profile.mark('info update')
+
+    def get_dirty_rects(self) -> list[pg.Rect]:
+        """Screen areas (at 1x) that changed during the last draw()"""
+        rects = []
+        for rect in self.board.drawn_rects:
+            rects.append(rect.move(BOARD_POS))
+        for rect in self.info.drawn_rects:
+            rects.append(rect.move(INFO_POS))
+        rects += self.move_queue.drawn_rects
+
+        return rects
 
     def handle_click(self):
         if self.board.rect.collidepoint(self.board.get_mouse_pos()):
@@ -164,39 +189,127 @@ class Game():
                 self.new_game()
 
     def is_animating(self) -> bool:
-        if self.move_queue.is_animating():
-            return True
+        return self.move_queue.is_animating() \
+            or bool(self.board.grid.animating)
 
-        for die in self.board.dice:
-            if die.is_animating():
-                return True
+    def is_sliding(self) -> bool:
+        """
+        Whether a die is still sliding; it only matches once it lands, so
+        until then the board doesn't hold the move's outcome
+        """
+        return any(die.slide_direction for die in self.board.grid.animating)
 
-        return False
+    def get_pack_index(self) -> int:
+        """Record of {pack} for the current level, wrapping at the end"""
+        return (self.pack_start + self.level - 1) % len(self.pack)
 
     def load_next_level(self):
-        self.new_board()
+        if self.scores:  # This level's result, written out between levels
+            self.scores.flush()
 
         self.level += 1
+        self.new_board()
+        if self.pack:
+            self.move_queue = self.new_queue()
+
+        self.level_start_score = self.score
         self.num_moves = 0
         self.paused = False
+        self.replay.add(NEXT_LEVEL, self.level)
+        self.request_hint()
+
+    def load_state(self, state: engine.GameState, replay: ReplayLog):
+        """
+        Picks up a session from {state}, e.g. replayed to some point by
+        replay.Playback; {replay} is the log that led to it
+        """
+        self.rng.setstate(state.queue.rng.getstate())
+        self.board = Board(self.sprite_sheet, self.rng, self.animation_rng,
+                           self.num_rows, self.num_cols, state.board)
+        self.move_queue = Queue(self.sprite_sheet, self.rng, state.queue.moves)
+
+        self.level = state.level
+        self.most_dice = state.most_dice
+        self.num_moves = state.num_moves
+        self.paused = False
+        self.replay = replay
+        self.score = state.score
+        self.request_hint()
 
     def new_board(self):
-        self.board = Board(self.sprite_sheet)
+        state = self.pack.get_board(self.get_pack_index()) if self.pack \
+            else None
+        self.board = Board(self.sprite_sheet, self.rng, self.animation_rng,
+                           self.num_rows, self.num_cols, state)
 
     def new_game(self):
-        self.new_board()
+        if self.session_id is not None:
+            self.scores.end_session(self.session_id, self.score, self.level,
+                                    self.most_dice)
+            self.scores.flush()
 
         self.level = 1
+        self.new_board()
+
         self.most_dice = 0
-        self.move_queue = Queue(self.sprite_sheet)
+        self.move_queue = self.new_queue()
         self.num_moves = 0
         self.paused = False
         self.score = 0
+        self.level_start_score = 0
+        self.session_id = None
+        self.session_seed = None  # Dealt from wherever {rng} had got to
+        self.replay.add(NEW_GAME)
+        self.request_hint()
+
+    def new_queue(self) -> Queue:
+        """Pack levels each deal their own moves; otherwise {rng} does"""
+        rng = self.rng
+        if self.pack:
+            rng = random.Random(self.pack[self.get_pack_index()].seed)
+
+        return Queue(self.sprite_sheet, rng)
+
+    def play_move(self, die: Dice) -> int:
+        """
+        Plays {die} in the active move's direction, and if that works,
+        records it and moves the queue on. See execute_move() for status
+        codes.
+        """
+        row, col = die.row, die.col
+        move = self.move_queue.get_active_move()
+
+        status = self.execute_move(die)
+        if status == 0:
+            self.replay.add_move(row, col, move)
+            self.move_queue.advance()
+            self.num_moves += 1
+            self.request_hint()
+            if self.scores and self.session_id is None:
+                self.start_session()
+
+        return status
+
+    def play_record(self, record: Record):
+        """
+        Makes the choice in {record} as if the player had; raises
+        ReplayError if it can't be made the same way
+        """
+        if record.kind == NEXT_LEVEL:
+            self.load_next_level()
+        elif record.kind == NEW_GAME:
+            self.new_game()
+        else:
+            active = self.move_queue.get_active_move()
+            die = self.board.get_die_from_coords(record.row, record.col)
+            if active.name != MOVES[record.kind][0] or die is None \
+                    or self.play_move(die):
+                raise ReplayError(f'Can\'t replay {record} with {active}')
 
     def score_move(self):
         die_value = self.board.scoring_move['dice'][0]
         num_dice = len(self.board.scoring_move['dice'])
-        total = BASE_SCORE * num_dice * 2 + die_value * self.level
+        total = engine.score(num_dice, die_value, self.level)
         self.score += total
 
         self.check_best_move(num_dice)
@@ -206,26 +319,97 @@ class Game():
 
         self.board.scoring_move = []
 
-    def update(self, mouse_motion: bool):
+    def receive_hint(self, event: pg.event.Event):
+        """Keeps the result of a HINT_READY {event}, unless it's stale"""
+        if event.generation == self.hint_generation \
+                and not self.hint_outdated:
+            self.hint = event.coords
+
+    def request_hint(self):
+        """
+        Drops the hint for the board and queue as they were; tick() starts
+        a search for them as they are once no die is sliding
+        """
+        self.hint = None
+        self.hint_outdated = self.hints is not None
+        self.hint_wanted = False
+
+    def search_hint(self):
+        """Starts a search for the current board and queue"""
+        queue = self.move_queue
+        self.hint_generation = self.hints.request(
+            self.board.grid, queue.moves[queue.active_move_index:], self.level)
+        self.hint_outdated = False
+
+    def show_hint(self):
+        """Highlights the hinted die, once it's found and the board settles"""
+        self.hint_wanted = self.hints is not None and not self.paused
+
+    def start_session(self):
+        """Saves this game to {scores}, with the seed it can be dealt from"""
+        self.session_id = self.scores.start_session(
+            self.session_seed, self.num_rows, self.num_cols)
+
+    def stop(self):
+        if self.hints:
+            self.hints.stop()
+        if self.scores:
+            if self.session_id is not None:
+                self.scores.end_session(self.session_id, self.score,
+                                        self.level, self.most_dice)
+            self.scores.close()
+
+    def tick(self, mouse_motion: bool = False,
+             profile: 'FrameProfile | None' = None):
+        """
+        Advances the game by one step of 1 / TICK_RATE seconds; all
+        animations count in ticks. Nothing is drawn until draw().
+        If given, {profile} is marked after each component updates.
+        """
         if self.board.scoring_move:
             self.score_move()
-
-        self.board.update(mouse_motion, self.move_queue.get_active_move(),
-                          self.is_animating())
-
+        if self.hint_outdated and not self.is_sliding():
+            self.search_hint()
+        if self.hint_wanted and self.hint and not self.is_animating():
+            die = self.board.get_die_from_coords(*self.hint)
+            if die is None or die.value < 1:  # Gone since the search began
+                self.hint = None
+                self.search_hint()
+            else:
+                self.board.highlight_coords = die.pos
+                self.board.show_highlight = 1
+                self.hint_wanted = False
+        if profile:
+            profile.mark('game logic')
+
+        self.board.update(mouse_motion, self.is_animating())
+        if profile:
+            profile.mark('board update')
         self.move_queue.update()
-        self.info.update(self.score, self.level, self.num_moves, self.most_dice,
-                         self.board.dice)
-
-        if self.paused:
-            return
-
-        win_status = self.check_win()
-        if win_status:
-            self.win(win_status)
+        if profile:
+            profile.mark('queue update')
+
+        if not self.paused:
+            win_status = self.check_win()
+            if win_status:
+                self.win(win_status)
+        if profile:
+            profile.mark('game logic')
+
+    def update(self, mouse_motion: bool,
+               profile: 'FrameProfile | None' = None):
+        """One tick, then draws the result as is"""
+        self.tick(mouse_motion, profile)
+        self.draw(1.0, profile)
 
     def win(self, status: int):
         self.paused = True
+        if self.session_id is not None:
+            self.scores.record_level(self.session_id, self.level, status,
+                                     self.score - self.level_start_score,
+                                     self.num_moves)
+            self.scores.update_session(self.session_id, self.score,
+                                       self.level, self.most_dice)
         if status == 1:
             self.board.banner = 'puzzle_complete'
         elif status == 2:
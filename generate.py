@@ -0,0 +1,242 @@
+import argparse
+import os
+import random
+import time
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import engine
+
+from batch import BatchGame
+from const import EMPTY, MOVES
+from levelpack import save_pack
+from replay import MOVE_INDICES
+from solver import Solver
+
+
+# Share of playouts that fail to clear the board, per band
+DIFFICULTY_BANDS = {
+    'easy':   (0.0, 0.7),
+    'medium': (0.7, 0.9),
+    'hard':   (0.9, 1.0),
+}
+LEVEL_MOVES = 128  # Of each level's queue that playouts and the solver see
+
+Levels = namedtuple('Levels', ['values', 'seeds', 'difficulty'])
+Stats  = namedtuple('Stats', ['sampled', 'filtered', 'solved', 'accepted'])
+
+
+def _merge(batches: list[Levels]) -> Levels:
+    return Levels(*(np.concatenate(arrays) for arrays in zip(*batches)))
+
+
+def count_grouped(values: np.ndarray) -> np.ndarray:
+    """Dice per board that already touch a die of the same value"""
+    dice = values > 0
+    grouped = np.zeros(values.shape, dtype=bool)
+    across = dice[:, :, 1:] & (values[:, :, 1:] == values[:, :, :-1])
+    down = dice[:, 1:, :] & (values[:, 1:, :] == values[:, :-1, :])
+    grouped[:, :, 1:] |= across
+    grouped[:, :, :-1] |= across
+    grouped[:, 1:, :] |= down
+    grouped[:, :-1, :] |= down
+
+    return grouped.sum(axis=(1, 2))
+
+
+def deal_moves(seeds: np.ndarray, length: int) -> np.ndarray:
+    """
+    The first {length} moves a Queue dealing from random.Random(seed)
+    plays, per seed in {seeds}, as indices into MOVES
+    """
+    moves = np.zeros((len(seeds), length), dtype=np.int8)
+    for n, seed in enumerate(seeds.tolist()):
+        rng = random.Random(seed)
+        names = []
+        while len(names) < length:
+            names.append(engine.roll_move(names[-3:], rng).name)
+        moves[n] = [MOVE_INDICES[name] for name in names]
+
+    return moves
+
+
+def sample_boards(num_boards: int, num_rows: int = 8, num_cols: int = 8,
+                  rng: np.random.Generator | None = None,
+                  fill: tuple[float] = (0.1, 0.4),
+                  num_values: tuple[int] = (2, 6),
+                  rock_rate: float = 0.1) -> np.ndarray:
+    """
+    Like batch.roll_boards(), but each board fills a share of its spaces
+    drawn from {fill}, with dice of only {num_values} different values
+    (both ranges inclusive), since full boards are almost never cleared
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    shape = (num_boards, num_rows, num_cols)
+
+    # Each board draws from the first few values of its own shuffle
+    palettes = rng.random((num_boards, 6)).argsort(axis=1).astype(np.int8) + 1
+    sizes = rng.integers(num_values[0], num_values[1] + 1, size=(num_boards, 1))
+    picks = (rng.random((num_boards, num_rows * num_cols)) * sizes).astype(int)
+    values = np.take_along_axis(palettes, picks, axis=1).reshape(shape)
+
+    values[rng.random(shape) < rock_rate] = 0
+    density = rng.uniform(*fill, size=(num_boards, 1, 1))
+    values[rng.random(shape) >= density] = EMPTY
+    return values
+
+
+def vet(values: np.ndarray, seeds: np.ndarray, rng: np.random.Generator,
+        band: tuple[float], num_playouts: int = 16, min_legal: int = 2,
+        max_grouped: float = 0.5, level: int = 1,
+        solve_beam: int = 16) -> tuple[Levels, Stats]:
+    """
+    Keeps the boards in {values} (each with its queue dealt from its
+    entry in {seeds}) that can be cleared and whose difficulty falls in
+    {band}, cheapest checks first:
+      - No value has a single die (it could never be matched), the
+        first move has at least {min_legal} dice to play and at most
+        {max_grouped} of the dice are already touching a match
+      - {num_playouts} games per board of the 'bump' policy; the share
+        that don't clear the board is its difficulty, and any that does
+        proves it can be cleared
+      - Boards no playout cleared are handed to Solver.solve(), if
+        {band} takes in 1
+    """
+    num_boards = len(values)
+    counts = np.stack([(values == n).sum(axis=(1, 2)) for n in range(1, 7)],
+                      axis=1)
+    num_dice = counts.sum(axis=1)
+    keep = (num_dice > 0) & ~(counts == 1).any(axis=1) \
+        & (count_grouped(values) <= num_dice * max_grouped)
+    values, seeds = values[keep], seeds[keep]
+
+    # Only boards that got this far are worth dealing moves for
+    moves = deal_moves(seeds, LEVEL_MOVES)
+    first = BatchGame(values.copy(), rng, level, moves=moves)
+    keep = (first.get_legal_masks().sum(axis=(1, 2)) >= min_legal) \
+        & (first.status == 0)
+    values, moves, seeds = values[keep], moves[keep], seeds[keep]
+    num_filtered = len(values)
+
+    games = BatchGame(np.repeat(values, num_playouts, axis=0), rng, level,
+                      moves=np.repeat(moves, num_playouts, axis=0))
+    result = games.run('bump', max_moves=moves.shape[1])
+    wins = (result.status == 2).reshape(-1, num_playouts).sum(axis=1)
+    difficulty = 1 - wins / num_playouts
+
+    low, high = band
+    keep = (difficulty >= low) & (difficulty <= high) & (wins > 0)
+    num_solved = 0
+    if low <= 1 <= high:  # Unbeaten boards count if the solver clears them
+        solver = Solver(*values.shape[1:])
+        for n in np.flatnonzero(wins == 0):
+            board = engine.BoardState(*values.shape[1:], values[n].copy())
+            if solver.solve(board, [engine.MoveState(*MOVES[index])
+                                    for index in moves[n]], level,
+                            solve_beam) is not None:
+                keep[n] = True
+                num_solved += 1
+
+    levels = Levels(values[keep], seeds[keep],
+                    difficulty[keep].astype(np.float32))
+    return levels, Stats(num_boards, num_filtered, num_solved,
+                         len(levels.values))
+
+
+def _run_chunk(seed: np.random.SeedSequence, num_boards: int,
+               band: tuple[float], num_rows: int, num_cols: int,
+               options: dict) -> tuple[Levels, Stats]:
+    rng = np.random.default_rng(seed)
+    values = sample_boards(num_boards, num_rows, num_cols, rng)
+    seeds = rng.integers(0, 2**32, size=num_boards, dtype=np.uint32)
+
+    return vet(values, seeds, rng, band, **options)
+
+
+def generate(num_levels: int, band: tuple[float], seed: int | None = None,
+             chunk_size: int = 1000, workers: int | None = None,
+             num_rows: int = 8, num_cols: int = 8,
+             max_boards: int | None = None,
+             **options) -> tuple[Levels, Stats]:
+    """
+    Samples chunks of {chunk_size} boards, each chunk with its own child
+    seed, across a pool of {workers} processes until {num_levels} pass
+    vet() (given {options}). Chunks are kept in the order they were
+    seeded, so the levels only depend on {seed} and {chunk_size}.
+
+    Gives up once {max_boards} have been sampled (default: 1000 per
+    level asked for), in case {band} hardly ever accepts a board of
+    this size; check how many levels came back.
+    """
+    workers = workers or os.cpu_count()
+    max_boards = num_levels * 1000 if max_boards is None else max_boards
+    seeds = np.random.SeedSequence(seed)
+    batches = []
+    stats = Stats(0, 0, 0, 0)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while stats.accepted < num_levels and stats.sampled < max_boards:
+            futures = [executor.submit(_run_chunk, chunk_seed, chunk_size,
+                                       band, num_rows, num_cols, options)
+                       for chunk_seed in seeds.spawn(workers * 2)]
+            for future in futures:
+                levels, chunk_stats = future.result()
+                batches.append(levels)
+                stats = Stats(*(a + b for a, b in zip(stats, chunk_stats)))
+
+    levels = _merge(batches)
+    return Levels(*(array[:num_levels] for array in levels)), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate levels that can be cleared, by difficulty')
+    parser.add_argument('-n', '--levels', type=int, default=1000)
+    parser.add_argument('-b', '--band', choices=DIFFICULTY_BANDS,
+                        default='medium')
+    parser.add_argument('-o', '--output', type=Path, default=None,
+                        help='save the levels to this level pack')
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=8)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--playouts', type=int, default=16,
+                        help='bump-policy games per candidate board')
+    parser.add_argument('--solve-beam', type=int, default=16,
+                        help='solver beam width for boards no playout clears')
+    parser.add_argument('--max-boards', type=int, default=None,
+                        help='give up after sampling this many boards '
+                             '(default: 1000 per level)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    levels, stats = generate(args.levels, DIFFICULTY_BANDS[args.band],
+                             args.seed, args.chunk_size, args.workers,
+                             args.rows, args.cols, args.max_boards,
+                             num_playouts=args.playouts,
+                             solve_beam=args.solve_beam)
+    elapsed = time.perf_counter() - start
+
+    print(f'{stats.sampled} boards sampled, {stats.filtered} passed the '
+          f'filters, {stats.solved} solved, {stats.accepted} accepted')
+    if len(levels.values) < args.levels:
+        parser.exit(1, f'Only found {len(levels.values)} of {args.levels} '
+                       f'{args.band} levels in {stats.sampled} boards; try '
+                       'another band or board size, or raise --max-boards\n')
+
+    if args.output:
+        save_pack(args.output, *levels)
+
+    print(f'{len(levels.values)} {args.band} levels (mean difficulty '
+          f'{levels.difficulty.mean():.2f}) in {elapsed:.2f}s '
+          f'({len(levels.values) / elapsed:,.0f} levels/s, '
+          f'{args.workers} workers)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+from const import EMPTY, MOVES
+from engine import BoardState, get_win_status
+
+
+class Grid(BoardState):
+    def __init__(self, num_rows: int, num_cols: int):
+        """
+        Occupancy index for the board: {values} mirrors each die's value
+        (EMPTY where there is no die) and {dice} holds the matching Dice
+        references, so lookups by (row, col) don't have to scan every die.
+        Being a BoardState, it can be handed straight to the rules engine.
+
+        {counts} (dice per value, rocks at 0) and {legal_counts} (movable
+        dice per move name) are kept up to date as dice are placed, moved
+        and killed, so win checks never rescan the board. Likewise
+        {animating} holds the dice that are mid-animation (a dict used as
+        an ordered set), so the dice at rest can be skipped every frame.
+        """
+        BoardState.__init__(self, num_rows, num_cols)
+
+        self.animating    = {}
+        self.counts       = [0] * 7
+        self.dice         = [[None] * num_cols for _ in range(num_rows)]
+        self.legal        = {name: bytearray(num_rows * num_cols)
+                             for name, _, _ in MOVES}
+        self.legal_counts = {name: 0 for name, _, _ in MOVES}
+
+    def check_win(self, move: 'Move') -> int:
+        """Same codes as engine.check_win(), without touching the board"""
+        return get_win_status(self.counts, self.legal_counts[move.name] > 0)
+
+    def clear(self, row: int, col: int, die: 'Dice'):
+        if self.dice[row][col] is die:  # Space may already be taken
+            self.dice[row][col] = None
+            self.set_value(row, col, EMPTY)
+
+    def get(self, row: int, col: int) -> 'Dice | None':
+        if not self.contains(row, col):
+            raise IndexError
+
+        return self.dice[row][col]
+
+    def is_legal(self, row: int, col: int, d_row: int, d_col: int) -> bool:
+        value = self.values[row, col]
+        if value < 1 or not self.contains(row + d_row, col + d_col):
+            return False
+
+        neighbor_value = self.values[row + d_row, col + d_col]
+        return bool(neighbor_value == EMPTY or neighbor_value == value)
+
+    def move(self, die: 'Dice', row: int, col: int):
+        self.clear(die.row, die.col, die)
+        self.dice[row][col] = die
+        self.set_value(row, col, die.value)
+
+    def place(self, die: 'Dice'):
+        die.grid = self
+        self.dice[die.row][die.col] = die
+        self.set_value(die.row, die.col, die.value)
+        if die.is_animating():
+            self.start_animating(die)
+
+    def refresh_legal(self, row: int, col: int):
+        """
+        A change at (row, col) can only affect whether that die, or the
+        die just behind it in each direction, can move
+        """
+        for name, axis, value in MOVES:
+            d_row, d_col = (value, 0) if axis == 'row' else (0, value)
+            for r, c in ((row, col), (row - d_row, col - d_col)):
+                if not self.contains(r, c):
+                    continue
+
+                index = r * self.num_cols + c
+                legal = self.is_legal(r, c, d_row, d_col)
+                if legal != self.legal[name][index]:
+                    self.legal[name][index] = legal
+                    self.legal_counts[name] += 1 if legal else -1
+
+    def remove(self, die: 'Dice'):
+        self.clear(die.row, die.col, die)
+        self.stop_animating(die)
+        die.grid = None
+
+    def set_value(self, row: int, col: int, value: int):
+        old_value = self.values[row, col]
+        if old_value >= 0:
+            self.counts[old_value] -= 1
+        if value >= 0:
+            self.counts[value] += 1
+
+        self.values[row, col] = value
+        self.refresh_legal(row, col)
+
+    def start_animating(self, die: 'Dice'):
+        self.animating[die] = None
+
+    def stop_animating(self, die: 'Dice'):
+        self.animating.pop(die, None)
+
+    def update_value(self, die: 'Dice'):
+        self.set_value(die.row, die.col, die.value)
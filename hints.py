@@ -0,0 +1,85 @@
+import threading
+
+import pygame as pg
+
+import engine
+
+from const import EMPTY, HINT_READY
+from solver import HINT_TIME, Solver
+
+
+def snapshot(board: engine.BoardState, moves: list['Move']) -> tuple:
+    """
+    Copies of {board} and {moves} that the game can't change under the
+    search. Dice still being killed are already gone as far as the
+    rules go.
+    """
+    values = board.values.copy()
+    values[values == -1] = EMPTY
+    return (engine.BoardState(board.num_rows, board.num_cols, values),
+            tuple(engine.MoveState(m.name, m.axis, m.value) for m in moves))
+
+
+class HintWorker():
+    def __init__(self, num_rows: int = 8, num_cols: int = 8,
+                 time_limit: float = HINT_TIME):
+        """
+        Searches for hints on a thread of its own, so the frame loop never
+        waits on one. Each request() supersedes the last, cancelling its
+        search if it's still running. A finished search posts a HINT_READY
+        event with its {generation} (as returned by request()) and the
+        {coords} of the die to play, or None if none can move.
+
+        The search is pure Python and shares the GIL with the frame loop,
+        so a long one makes animations stutter; {time_limit} defaults to
+        the solver's own under-50 ms hint budget.
+        """
+        self.solver     = Solver(num_rows, num_cols)
+        self.time_limit = time_limit
+
+        self.cancelled  = threading.Event()  # Of the search running, if any
+        self.condition  = threading.Condition()
+        self.generation = 0
+        self.pending    = None  # (generation, board, moves, level)
+        self.stopped    = False
+
+        self.thread = threading.Thread(target=self.run, name='hints',
+                                       daemon=True)
+        self.thread.start()
+
+    def request(self, board: engine.BoardState, moves: list['Move'],
+                level: int) -> int:
+        """Starts a search for the next die to play; returns its generation"""
+        board, moves = snapshot(board, moves)
+        with self.condition:
+            self.generation += 1
+            self.cancelled.set()
+            self.pending = (self.generation, board, moves, level)
+            self.condition.notify()
+
+            return self.generation
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+
+                generation, board, moves, level = self.pending
+                self.pending = None
+                self.cancelled = cancelled = threading.Event()
+
+            coords = self.solver.hint(board, moves, level, self.time_limit,
+                                      cancelled=cancelled)
+            if not cancelled.is_set():
+                pg.event.post(pg.event.Event(HINT_READY, generation=generation,
+                                             coords=coords))
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.cancelled.set()
+            self.condition.notify()
+        self.thread.join()
@@ -8,6 +8,11 @@ from const import Color, ARROW_SIZE, DIE_SPRITE_SIZE, MINI_DIE_SIZE, \
 
 class SpriteSheet():
     def __init__(self, base_path: Path):
+        """
+        Sprites are subsurfaces of {sprite_sheet}: views that share its
+        pixels, so slicing the sheet copies nothing. Nothing draws onto
+        them; anything that needs its own copy should call .copy().
+        """
         color = Color()
 
         self.sprite_sheet = pg.image.load(
@@ -16,83 +21,67 @@ class SpriteSheet():
         self.dice = dict()
         self.dice_ghosts = dict()
         for n in range(7):
-            self.dice[n] = pg.Surface(DIE_SPRITE_SIZE, pg.SRCALPHA)
-            self.dice[n].blit(
-                self.sprite_sheet, (DIE_SPRITE_SIZE.x * -n, 0))
-            self.dice_ghosts[n] = pg.Surface(DIE_SPRITE_SIZE, pg.SRCALPHA)
-            self.dice_ghosts[n].blit(
-                self.sprite_sheet, (DIE_SPRITE_SIZE.x * -n, -48))
+            self.dice[n] = self.get_sprite(
+                DIE_SPRITE_SIZE.x * n, 0, DIE_SPRITE_SIZE)
+            self.dice_ghosts[n] = self.get_sprite(
+                DIE_SPRITE_SIZE.x * n, 48, DIE_SPRITE_SIZE)
 
         self.mini_dice = []
         for n in range(6):
-            die = pg.Surface(MINI_DIE_SIZE, pg.SRCALPHA)
-            die.blit(self.sprite_sheet, (16 * -n - 224, -32))
-            self.mini_dice.append(die)
+            self.mini_dice.append(self.get_sprite(16 * n + 224, 32,
+                                                  MINI_DIE_SIZE))
 
         self.dice_flash = {}
-        self.dice_flash['solid'] = pg.Surface(DIE_SPRITE_SIZE, pg.SRCALPHA)
-        self.dice_flash['solid'].blit(
-            self.sprite_sheet, (DIE_SPRITE_SIZE.x * -7, -48))
-        self.dice_flash['wireframe'] = pg.Surface(
-            DIE_SPRITE_SIZE, pg.SRCALPHA)
-        self.dice_flash['wireframe'].blit(
-            self.sprite_sheet, (DIE_SPRITE_SIZE.x * -8, -48))
+        self.dice_flash['solid'] = self.get_sprite(
+            DIE_SPRITE_SIZE.x * 7, 48, DIE_SPRITE_SIZE)
+        self.dice_flash['wireframe'] = self.get_sprite(
+            DIE_SPRITE_SIZE.x * 8, 48, DIE_SPRITE_SIZE)
 
-        self.highlight = pg.Surface(SELECTION_SIZE, pg.SRCALPHA)
-        self.highlight.blit(self.sprite_sheet, (-224, 0))
+        self.highlight = self.get_sprite(224, 0, SELECTION_SIZE)
+        self.dimlight = self.get_sprite(256, 0, SELECTION_SIZE)
 
-        self.dimlight = pg.Surface(SELECTION_SIZE, pg.SRCALPHA)
-        self.dimlight.blit(self.sprite_sheet, (-256, 0))
-
-        self.shadow = pg.Surface(SELECTION_SIZE, pg.SRCALPHA)
-        self.shadow.blit(self.sprite_sheet, (-288, 0))
-        self.shadow.set_alpha(32)
+        self.shadow = self.get_sprite(288, 0, SELECTION_SIZE)
+        self.shadow.set_alpha(32)  # Only affects this view, not the sheet
 
         arrow_names = ['ne', 'nw', 'sw', 'se']
         self.arrows = {}
         self.dark_arrows = {}
         for n in range(4):
-            self.arrows[arrow_names[n]] = pg.Surface(ARROW_SIZE, pg.SRCALPHA)
-            self.arrows[arrow_names[n]].blit(
-                self.sprite_sheet, (-ARROW_SIZE.x * n, -96))
-
-            self.dark_arrows[arrow_names[n]] = pg.Surface(
-                ARROW_SIZE, pg.SRCALPHA)
-            self.dark_arrows[arrow_names[n]].blit(
-                self.sprite_sheet, (-ARROW_SIZE.x * n, -160))
+            self.arrows[arrow_names[n]] = self.get_sprite(
+                ARROW_SIZE.x * n, 96, ARROW_SIZE)
+            self.dark_arrows[arrow_names[n]] = self.get_sprite(
+                ARROW_SIZE.x * n, 160, ARROW_SIZE)
 
+        # Runs past the right edge of the sheet, so it has to be a copy
         self.next_badge = pg.Surface(ARROW_SIZE + (0, 6), pg.SRCALPHA)
         self.next_badge.blit(self.sprite_sheet, (-264, -95))
 
-        queue_track = pg.Surface((96, 14), pg.SRCALPHA)
-        queue_track.blit(self.sprite_sheet, (-224, -17))
+        queue_track = self.get_sprite(224, 17, (96, 14))
         self.queue_track = pg.Surface((SCREEN_SIZE.x / 2, 14), pg.SRCALPHA)
         for n in range(5):
             self.queue_track.blit(queue_track, (96 * n, 0))
 
-        self.info_bg = pg.image.load(base_path / 'img' / 'info_bg.bmp')
+        # Backgrounds are loaded once here and shared by every Board/Info
+        self.board_bg = pg.image.load(
+            base_path / 'img' / 'bg.bmp').convert_alpha()
+        self.info_bg = pg.image.load(
+            base_path / 'img' / 'info_bg.bmp').convert_alpha()
 
         self.score_font = {}
         for n in range(10):
-            self.score_font[str(n)] = pg.Surface(SCORE_LETTER_SIZE, pg.SRCALPHA)
-            self.score_font[str(n)].blit(
-                self.sprite_sheet, (n * -SCORE_LETTER_SIZE.x, -224))
-        self.score_font['+'] = pg.Surface(SCORE_LETTER_SIZE, pg.SRCALPHA)
-        self.score_font['+'].blit(
-                self.sprite_sheet, (10 * -SCORE_LETTER_SIZE.x, -224))
-
-        self.puzzle_complete = pg.Surface((195, 19), pg.SRCALPHA)
-        self.puzzle_complete.blit(self.sprite_sheet, (0, -240))
-        self.puzzle_won = pg.Surface((195, 19), pg.SRCALPHA)
-        self.puzzle_won.blit(self.sprite_sheet, (0, -259))
-        self.game_over = pg.Surface((195, 19), pg.SRCALPHA)
-        self.game_over.blit(self.sprite_sheet, (0, -278))
-
-        self.continue_button = pg.Surface((105, 23), pg.SRCALPHA)
-        self.continue_button.blit(self.sprite_sheet, (-208, -224))
-
-        self.restart_button = pg.Surface((105, 23), pg.SRCALPHA)
-        self.restart_button.blit(self.sprite_sheet, (-208, -247))
-
-        self.new_game_button = pg.Surface((66, 12), pg.SRCALPHA)
-        self.new_game_button.blit(self.sprite_sheet, (-208, -272))
+            self.score_font[str(n)] = self.get_sprite(
+                SCORE_LETTER_SIZE.x * n, 224, SCORE_LETTER_SIZE)
+        self.score_font['+'] = self.get_sprite(
+            SCORE_LETTER_SIZE.x * 10, 224, SCORE_LETTER_SIZE)
+
+        self.puzzle_complete = self.get_sprite(0, 240, (195, 19))
+        self.puzzle_won = self.get_sprite(0, 259, (195, 19))
+        self.game_over = self.get_sprite(0, 278, (195, 19))
+
+        self.continue_button = self.get_sprite(208, 224, (105, 23))
+        self.restart_button = self.get_sprite(208, 247, (105, 23))
+        self.new_game_button = self.get_sprite(208, 272, (66, 12))
+
+    def get_sprite(self, x: float, y: float,
+                   size: tuple[float]) -> pg.Surface:
+        return self.sprite_sheet.subsurface(pg.Rect((x, y), size))
@@ -0,0 +1,146 @@
+import argparse
+import mmap
+import struct
+import time
+
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+import engine
+
+from const import EMPTY
+
+
+HEADER = struct.Struct('<4sBHH')  # Magic, version, rows, cols
+MAGIC = b'DLVL'
+VERSION = 1
+
+PackedLevel = namedtuple('PackedLevel', ['values', 'seed', 'difficulty'])
+
+
+class LevelPackError(Exception):
+    pass
+
+
+def get_record_dtype(num_rows: int, num_cols: int) -> np.dtype:
+    """
+    One fixed-size record per level: its dice two to a byte (see
+    pack_values()), the seed its queue deals moves from and how hard
+    generate.py found it
+    """
+    return np.dtype([('values', np.uint8, ((num_rows * num_cols + 1) // 2,)),
+                     ('seed', '<u4'),
+                     ('difficulty', '<f2')])
+
+
+def pack_values(values: np.ndarray) -> np.ndarray:
+    """
+    Packs (N, rows, cols) boards of grid values into (N, bytes) of 4-bit
+    nibbles, value - EMPTY each, first space in the high nibble
+    """
+    num_spaces = values.shape[1] * values.shape[2]  # -1 can't size N = 0
+    nibbles = values.reshape(len(values), num_spaces) - EMPTY
+    nibbles = nibbles.astype(np.uint8)
+    if nibbles.shape[1] % 2:
+        nibbles = np.pad(nibbles, ((0, 0), (0, 1)))
+
+    return (nibbles[:, ::2] << 4) | nibbles[:, 1::2]
+
+
+def unpack_values(packed: np.ndarray, num_rows: int,
+                  num_cols: int) -> np.ndarray:
+    """Reverses pack_values() for one packed board"""
+    nibbles = np.empty(len(packed) * 2, dtype=np.int8)
+    nibbles[::2] = packed >> 4
+    nibbles[1::2] = packed & 0xF
+
+    return (nibbles[:num_rows * num_cols] + EMPTY).reshape(num_rows, num_cols)
+
+
+def save_pack(path: Path, values: np.ndarray, seeds: np.ndarray,
+              difficulty: np.ndarray):
+    """Writes a pack of the (N, rows, cols) boards in {values}"""
+    num_rows, num_cols = values.shape[1:]
+    records = np.zeros(len(values), dtype=get_record_dtype(num_rows, num_cols))
+    records['values'] = pack_values(values)
+    records['seed'] = seeds
+    records['difficulty'] = difficulty
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, num_rows, num_cols))
+        records.tofile(f)
+
+
+class LevelPack():
+    def __init__(self, path: Path):
+        """
+        Memory-maps the pack at {path}. Only the header is read up front;
+        a record is read (and unpacked) when it's asked for, so a pack
+        opens just as fast and takes up next to no memory however many
+        levels it holds.
+        """
+        self.path = Path(path)
+
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise LevelPackError('Not a level pack')
+        magic, version, self.num_rows, self.num_cols = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise LevelPackError('Not a level pack')
+        if version != VERSION:
+            raise LevelPackError(f'Unsupported level pack version {version}')
+
+        dtype = get_record_dtype(self.num_rows, self.num_cols)
+        size = self.path.stat().st_size - HEADER.size
+        if size % dtype.itemsize:
+            raise LevelPackError('Level pack is truncated')
+        if not size:
+            raise LevelPackError('Level pack has no levels')
+
+        with open(self.path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, 'MADV_RANDOM'):  # Levels are read one at a time, so
+            self.mmap.madvise(mmap.MADV_RANDOM)  # don't read ahead of them
+        self.records = np.frombuffer(self.mmap, dtype, offset=HEADER.size)
+
+    def __getitem__(self, index: int) -> PackedLevel:
+        record = self.records[index]
+        return PackedLevel(
+            unpack_values(record['values'], self.num_rows, self.num_cols),
+            int(record['seed']), float(record['difficulty']))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return f'LevelPack: {len(self)} {self.num_rows}x{self.num_cols} levels'
+
+    def get_board(self, index: int) -> engine.BoardState:
+        return engine.BoardState(self.num_rows, self.num_cols,
+                                 self[index].values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show a level from a pack')
+    parser.add_argument('pack', type=Path)
+    parser.add_argument('-n', '--index', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pack = LevelPack(args.pack)
+    level = pack[args.index]
+    elapsed = time.perf_counter() - start
+
+    print(pack)
+    print(f'level {args.index}: queue seed {level.seed}, '
+          f'difficulty {level.difficulty:.2f}')
+    for row in level.values:
+        print(' '.join('.' if value < 0 else str(value) for value in row))
+    print(f'opened and read in {elapsed * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,58 +1,376 @@
+import argparse
+import atexit
 import os
+import random
+import time
+
+START_TIME = time.perf_counter()  # Before the heavy imports below
 
 from pathlib import Path
 
 import pygame as pg
 
-from const import Color, BOARD_POS, INFO_POS, SCREEN_SIZE
-from dice import Dice
+import engine
+
+from const import Color, BOARD_POS, FPS, HINT_READY, INFO_POS, \
+                  MAX_FRAME_TICKS, REPLAY_DELAY, SCREEN_SIZE, SCROLL_SPEED, \
+                  TICK_RATE
 from game import Game
 
 
-def main():
+def draw_dirty_rects(screen: pg.Surface, screen_2x: pg.Surface, game: Game,
+                     color: Color,
+                     frame_profile: 'FrameProfile | None' = None
+                     ) -> list[pg.Rect]:
+    """
+    Recomposites and upscales only the areas that changed; returns the
+    areas of {screen_2x} to pass to pg.display.update()
+    """
+    rects = game.get_dirty_rects()
+    for rect in rects:
+        screen.set_clip(rect)
+        screen.fill(color.black)
+        screen.blit(game.info.image, INFO_POS)
+        screen.blit(game.board.image, BOARD_POS)
+        screen.blit(game.move_queue.image, (0, 0))
+    screen.set_clip(None)
+    if frame_profile:
+        frame_profile.mark('composite')
+
+    updated = []
+    for rect in rects:
+        # scale2x looks at neighboring pixels, so the 1px ring around
+        # {rect} changes too, and scaling that takes a 2px margin
+        changed = rect.inflate(2, 2).clip(screen.get_rect())
+        area = rect.inflate(4, 4).clip(screen.get_rect())
+        scaled = pg.transform.scale2x(screen.subsurface(area))
+        inner = pg.Rect((changed.x - area.x) * 2, (changed.y - area.y) * 2,
+                        changed.width * 2, changed.height * 2)
+        updated.append(screen_2x.blit(scaled, (changed.x * 2, changed.y * 2),
+                                      inner))
+    if frame_profile:
+        frame_profile.mark('scale2x')
+
+    return updated
+
+
+def seek_replay(game: Game, playback: 'Playback', index: int) -> int:
+    """
+    Jumps {game} to where it was {index} records into the replay (or as
+    near as the log goes); returns the index it landed on
+    """
+    state = playback.seek(index)
+    game.load_state(state, playback.log.copy(playback.index))
+
+    return playback.index
+
+
+def main(seed: int | None = None, dirty_rects: bool = False,
+         profile: 'StartupProfile | None' = None,
+         frame_profile: 'FrameProfile | None' = None, num_rows: int = 8,
+         num_cols: int = 8, fps: int = FPS, vsync: bool = False,
+         record_path: Path | None = None, replay: 'ReplayLog | None' = None,
+         seek: int = 0, pack: 'LevelPack | None' = None, pack_start: int = 0,
+         scores_path: Path | None = None):
+    """
+    The game ticks TICK_RATE times a second however fast it draws:
+    {fps} caps the frame rate (0 draws as often as possible), as does
+    {vsync}, and frames between ticks show animations part way along.
+    Frames where nothing changed aren't composited or presented, so an
+    idle screen costs next to nothing.
+
+    The session's choices are saved to {record_path}, if given. Given
+    a {replay}, its session plays back from {seek} records in, with
+    PageUp/PageDown jumping back/ahead; once it runs out, play carries
+    on as normal.
+
+    Given a {pack}, its levels are played in order from {pack_start}.
+
+    Results and all-time bests are kept in the database at
+    {scores_path}, if given; replayed sessions aren't saved there.
+
+    If given, {profile} is reported once the first frame is shown, and
+    {frame_profile} times every frame, drawn over the top right of the
+    screen (F3 toggles the overlay). Boards too big for the screen
+    scroll with the arrow keys. H highlights a hint, searched for in
+    the background after every move.
+    """
     base_path  = Path(os.path.dirname(os.path.abspath(__file__)))
+    if replay:  # Its session decides the seed and board size
+        seed, num_rows, num_cols = (replay.seed, replay.num_rows,
+                                    replay.num_cols)
 
-    screen_2x    = pg.display.set_mode(SCREEN_SIZE)
+    screen_2x = None
+    if vsync:
+        try:  # Only supported for scaled or OpenGL windows
+            screen_2x = pg.display.set_mode(SCREEN_SIZE, pg.SCALED, vsync=1)
+        except pg.error:
+            print('vsync unavailable, falling back to --fps')
+    if screen_2x is None:
+        screen_2x = pg.display.set_mode(SCREEN_SIZE)
+    if profile:
+        profile.mark('display')
     screen       = pg.Surface(SCREEN_SIZE / 2)
     clock        = pg.time.Clock()
     color        = Color()
-    game         = Game(base_path)
+    scores       = None
+    if scores_path and not replay:
+        from scores import ScoreStore  # sqlite3 only loads if it's used
+        scores = ScoreStore(scores_path)
+    game         = Game(base_path, seed, profile, num_rows, num_cols,
+                        hints=True, pack=pack, pack_start=pack_start,
+                        scores=scores)
     mouse_motion = False
+    redraw_all   = True  # Dirty rects only cover what changed since
     running      = True
+    tick_time    = 1000 / TICK_RATE  # ms
+    accumulator  = tick_time  # ms of game time owed; the first tick is due
+
+    overlay_font = pg.font.Font(base_path / 'assets' / 'kart.ttf', 14)
+    show_overlay = True
+
+    if record_path:  # Saved however the game ends, crashes included
+        atexit.register(lambda: game.replay.save(record_path))
+
+    playback     = None
+    if replay:
+        from replay import Playback
+        playback = Playback(replay)
+    replay_index = 0  # Records of {replay} played so far
+    idle_ticks   = 0  # Since the last replayed record
+    if playback and seek:
+        replay_index = seek_replay(game, playback, seek)
 
     while running:
-        clock.tick(30)  # FPS
+        if frame_profile:
+            frame_profile.start_frame()
 
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 running = False
+            elif event.type == pg.KEYDOWN and event.key == pg.K_F3:
+                show_overlay = not show_overlay
+                redraw_all = True
+            elif event.type == pg.KEYDOWN and event.key == pg.K_h:
+                game.show_hint()
+            elif event.type == HINT_READY:
+                game.receive_hint(event)
+            elif event.type == pg.KEYDOWN and playback \
+                    and event.key in (pg.K_PAGEUP, pg.K_PAGEDOWN):
+                step = 10 if event.key == pg.K_PAGEDOWN else -10
+                replay_index = seek_replay(game, playback, replay_index + step)
             elif event.type == pg.MOUSEMOTION:
                 mouse_motion = True
+            elif event.type == pg.WINDOWEXPOSED:
+                redraw_all = True
             elif event.type == pg.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
-                    if not game.is_animating():
+                    replaying = playback \
+                        and replay_index < len(playback.log)
+                    if not game.is_animating() and not replaying:
                         game.handle_click()
 
-        game.update(mouse_motion)
+        keys = pg.key.get_pressed()
+        dx = keys[pg.K_RIGHT] - keys[pg.K_LEFT]
+        dy = keys[pg.K_DOWN] - keys[pg.K_UP]
+        if frame_profile:
+            frame_profile.mark('events')
 
-        # Draw small screen
-        screen.fill(color.black)
-        screen.blit(game.info.image, INFO_POS)
-        screen.blit(game.board.image, BOARD_POS)
-        screen.blit(game.move_queue.image, (0, 0))
+        num_ticks = 0
+        while accumulator >= tick_time and num_ticks < MAX_FRAME_TICKS:
+            if dx or dy:
+                game.board.scroll(dx * SCROLL_SPEED, dy * SCROLL_SPEED)
+            game.tick(mouse_motion, frame_profile)
+            accumulator -= tick_time
+            mouse_motion = False
+            num_ticks += 1
+
+            if playback and replay_index < len(playback.log) \
+                    and not game.is_animating():
+                idle_ticks += 1
+                if idle_ticks >= REPLAY_DELAY:
+                    game.play_record(playback.log[replay_index])
+                    replay_index += 1
+                    idle_ticks = 0
+        accumulator = min(accumulator, tick_time)  # Drop time we can't catch up
+
+        game.draw(accumulator / tick_time, frame_profile)
+        if profile:
+            profile.mark('first update')
+
+        overlay = frame_profile and show_overlay  # Redrawn every frame
+        if not (redraw_all or overlay or game.get_dirty_rects()):
+            updated = []  # Nothing to present
+        elif dirty_rects and not redraw_all:
+            updated = draw_dirty_rects(screen, screen_2x, game, color,
+                                       frame_profile)
+        else:
+            # Draw small screen
+            screen.fill(color.black)
+            screen.blit(game.info.image, INFO_POS)
+            screen.blit(game.board.image, BOARD_POS)
+            screen.blit(game.move_queue.image, (0, 0))
+            if frame_profile:
+                frame_profile.mark('composite')
+
+            # Double and draw 2x screen
+            screen_2x.fill(color.black)
+            pg.transform.scale2x(screen, screen_2x)
+            if frame_profile:
+                frame_profile.mark('scale2x')
+            updated = None
+
+        if overlay:
+            overlay_rect = frame_profile.draw(screen_2x, overlay_font)
+            if updated is not None:
+                updated.append(overlay_rect)
+            frame_profile.mark('overlay')
+
+        if updated is None:
+            pg.display.flip()
+        elif updated:
+            pg.display.update(updated)
+        if frame_profile:
+            frame_profile.mark('display')
+            frame_profile.end_frame()
+
+        if profile:
+            profile.mark('first draw')
+            print(profile.report())
+            profile = None
+
+        redraw_all = False
 
-        # Double and draw 2x screen
-        screen_2x.fill(color.black)
-        pg.transform.scale2x(screen, screen_2x)
-        pg.display.flip()
+        # Waiting here gets the first frame up sooner. vsync only paces
+        # frames that were presented, so idle ones fall back on {fps}.
+        accumulator += clock.tick(0 if vsync and updated != [] else fps)
 
-        mouse_motion = False
+    game.stop()
+    if frame_profile:
+        frame_profile.close()
+
+
+def run_headless(seed: int | None = None, num_games: int = 1,
+                 num_rows: int = 8, num_cols: int = 8,
+                 max_ticks: int = 100_000):
+    """
+    Plays {num_games} games of random legal moves, ticking as fast as
+    possible with nothing drawn, and prints how each went. Finished
+    puzzles go on to the next level, so a game lasts until it's lost
+    or hits {max_ticks}.
+    """
+    base_path = Path(os.path.dirname(os.path.abspath(__file__)))
+    pg.display.set_mode(SCREEN_SIZE)  # The sprite sheet needs one to convert
+    rng = random.Random(seed)  # Picks the seed of each game and its moves
+
+    total_ticks = 0
+    start = time.perf_counter()
+    for n in range(num_games):
+        game = Game(base_path, rng.getrandbits(32), None, num_rows, num_cols)
+        num_ticks = 0
+        while num_ticks < max_ticks:
+            game.tick()
+            game.board.dirty_rects.clear()  # Nothing draws them
+            num_ticks += 1
+
+            if game.paused:
+                if game.board.banner == 'game_over':
+                    break
+                game.load_next_level()
+            elif not game.is_animating():
+                moves = engine.legal_moves(game.board.grid,
+                                           game.move_queue.get_active_move())
+                game.play_move(game.board.get_die_from_coords(
+                    *rng.choice(moves)))
+
+        total_ticks += num_ticks
+        print(f'game {n}: seed {game.seed}, level {game.level}, '
+              f'score {game.score}, {num_ticks} ticks')
+
+    elapsed = time.perf_counter() - start
+    print(f'{total_ticks} ticks in {elapsed:.2f} s '
+          f'({total_ticks / elapsed:,.0f} ticks/s, '
+          f'{total_ticks / TICK_RATE / elapsed:,.0f}x real time)')
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seed', type=int, default=None,
+                        help='replay the same boards and moves')
+    parser.add_argument('--rows', type=int, default=8,
+                        help='board size; big boards scroll with arrow keys')
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--fps', type=int, default=FPS,
+                        help=f'cap the frame rate (default: {FPS}); the game '
+                             f'itself always runs at {TICK_RATE} ticks/s')
+    parser.add_argument('--uncapped', action='store_true',
+                        help='draw as often as possible, e.g. to benchmark')
+    parser.add_argument('--vsync', action='store_true',
+                        help='draw once per display refresh instead')
+    parser.add_argument('--headless', type=int, default=None, metavar='GAMES',
+                        help='play this many games of random moves as fast as '
+                             'possible, with no window, and print the results')
+    parser.add_argument('--record', type=Path, default=None,
+                        help='save a replay log of the session to this file')
+    parser.add_argument('--replay', type=Path, default=None,
+                        help='play back a replay log (PageUp/PageDown seek)')
+    parser.add_argument('--seek', type=int, default=0,
+                        help='start the replay this many records in')
+    parser.add_argument('--pack', type=Path, default=None,
+                        help='play the levels of a level pack, in order')
+    parser.add_argument('--pack-level', type=int, default=0,
+                        help='start at this record of the pack')
+    parser.add_argument('--scores', type=Path,
+                        default=Path(__file__).parent / 'scores.db',
+                        help='keep high scores and stats in this database')
+    parser.add_argument('--no-scores', action='store_true',
+                        help="don't save this session's scores")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='only redraw the parts of the screen that change')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print how long each step took to first frame')
+    parser.add_argument('--profile-frames', action='store_true',
+                        help='time each phase of every frame, shown on screen')
+    parser.add_argument('--profile-csv', type=Path, default=None,
+                        help='also write per-frame times to this CSV file '
+                             '(implies --profile-frames)')
+    args = parser.parse_args()
+    if args.pack and (args.record or args.replay or args.headless is not None):
+        parser.error('--pack can\'t be recorded, replayed or run headless')
+
+    if args.headless is not None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    profile = None
+    if args.profile_startup:
+        from profiling import StartupProfile
+        profile = StartupProfile(START_TIME)
+        profile.mark('imports')
+
     pg.init()
     pg.font.init()
+    if profile:
+        profile.mark('pygame init')
 
     pg.display.set_caption('Dice-o-metric')
 
-    main()
+    frame_profile = None
+    if args.profile_frames or args.profile_csv:
+        from profiling import FrameProfile
+        frame_profile = FrameProfile(csv_path=args.profile_csv)
+
+    if args.headless is not None:
+        run_headless(args.seed, args.headless, args.rows, args.cols)
+    else:
+        replay = None
+        if args.replay:
+            from replay import ReplayLog
+            replay = ReplayLog.load(args.replay)
+        pack = None
+        if args.pack:
+            from levelpack import LevelPack  # Only packs need mmap
+            pack = LevelPack(args.pack)
+        main(args.seed, args.dirty_rects, profile, frame_profile, args.rows,
+             args.cols, 0 if args.uncapped else args.fps, args.vsync,
+             args.record, replay, args.seek, pack, args.pack_level,
+             None if args.no_scores else args.scores)
@@ -1,9 +1,11 @@
-from random import randint
+import random
 
 import pygame as pg
-import pytweening
 
-from const import Color, MOVE_QUEUE_SIZE, MOVES, NEXT_BADGE_POS, SCREEN_SIZE
+import engine
+
+from const import Color, MOVE_QUEUE_SIZE, NEXT_BADGE_POS, SCREEN_SIZE
+from curves import get_curve
 from image import SpriteSheet
 
 
@@ -31,19 +33,6 @@ class Move():
     def deactivate(self):
         self.active_image = self.dark_image
 
-    def rotate(self):
-        index = MOVES.index([m for m in MOVES if m[0] == self.name][0])
-        if index == 3:
-            index = 1
-        else:
-            index += 1
-
-        self.name = MOVES[index][0]
-        self.axis = MOVES[index][1]
-        self.value = MOVES[index][2]
-
-        self.set_images()
-
     def set_images(self):
         self.base_image = self.sprite_sheet.arrows[self.name]
         self.dark_image = self.sprite_sheet.dark_arrows[self.name]
@@ -51,7 +40,14 @@ class Move():
 
 
 class Queue():
-    def __init__(self, sprite_sheet: SpriteSheet):
+    def __init__(self, sprite_sheet: SpriteSheet,
+                 rng: random.Random = random,
+                 moves: list[engine.MoveState] | None = None):
+        """
+        {moves} (the active move, then those coming up) are dealt from
+        {rng} unless given
+        """
+        self.rng          = rng
         self.sprite_sheet = sprite_sheet
 
         self.active_move_index = 3
@@ -59,10 +55,17 @@ class Queue():
         self.image             = pg.Surface(MOVE_QUEUE_SIZE, pg.SRCALPHA)
         self.max_moves         = 7
         self.move_width        = 68
-        self.moves             = [None, None, None]
+        self.moves             = [None, None, None]  # Already played
+        self.curve             = None  # Offsets of each move, per tick
         self.offset_step       = 0
-        self.offsets           = []
-
+        self.prev_step         = 0  # {offset_step} before the last update()
+        self.redraw            = True  # Set whenever the moves change
+        self.drawn_rects       = []
+
+        for move in moves or []:
+            self.moves.append(Move(*move,
+                                   pos=(self.move_width * len(self.moves), 0),
+                                   sprite_sheet=self.sprite_sheet))
         while len(self.moves) < self.max_moves:
             self.spawn_move()
         self.moves[self.active_move_index].activate()
@@ -73,36 +76,42 @@ class Queue():
         return self.moves[index]
 
     def advance(self):
+        self.redraw = True
         self.spawn_move()
         self.active_move_index = 4
         self.offset_step = 1
+        self.prev_step = 0
 
     def animate(self):
+        self.prev_step = self.offset_step
         if self.offset_step:
-            if self.offset_step < len(self.offsets) - 1:
+            if self.offset_step < len(self.curve) - 2:  # Skip the end point
                 self.offset_step += 1
             else:
                 self.delete_offscreen_move()
                 self.offset_step = 0
 
     def build_animation(self):
-        from game import _convert_raw_positions_to_offsets
-
-        num_frames = 20
-        target_x = -68
-
-        raw_positions = [
-            pytweening.easeInOutQuad((n / num_frames)) * target_x \
-                for n in range(num_frames + 1)
-        ]
-        raw_positions = [pg.math.Vector2(x, 0) for x in raw_positions]
-        self.offsets = _convert_raw_positions_to_offsets(raw_positions)
+        self.curve = get_curve('easeInOutQuad', 20, (-self.move_width, 0))
 
     def delete_offscreen_move(self):
         self.moves.pop(0)
         self.active_move_index = 3
+        self.redraw = True
+
+    def draw(self, alpha: float = 1.0):
+        """
+        Redraws the moves if they changed, sliding them {alpha} of the way
+        from their offsets before the last update() to their current ones
+        """
+        if self.redraw or self.offset_step:
+            self.draw_moves(alpha)
+            self.drawn_rects = [self.image.get_rect()]
+            self.redraw = False
+        else:
+            self.drawn_rects = []
 
-    def draw(self):
+    def draw_moves(self, alpha: float = 1.0):
         self.image.fill(self.color.transparent)
         self.image.blit(self.sprite_sheet.queue_track, (0, 25))
 
@@ -115,10 +124,10 @@ class Queue():
             else:
                 move.deactivate()
 
+            move.pos = pg.math.Vector2(self.move_width * n, 0)
             if self.offset_step:
-                move.pos += self.offsets[self.offset_step]
-            else:
-                move.pos = pg.math.Vector2(self.move_width * n, 0)
+                prev, offset = self.curve[[self.prev_step, self.offset_step]]
+                move.pos += prev + (offset - prev) * alpha
 
             self.image.blit(move.active_image, move.pos)
 
@@ -132,19 +141,14 @@ class Queue():
 
     def spawn_move(self):
         num_moves = len(self.moves)
+        # Can't use self.moves directly below because it may have Nones in it
         move = Move(
-            *MOVES[randint(0, 3)], pos=(self.move_width * num_moves, 0),
+            *engine.roll_move([m.name for m in self.moves if m], self.rng),
+            pos=(self.move_width * num_moves, 0),
             sprite_sheet=self.sprite_sheet)
 
-        # Prevent 4-in-a-row of the same move type
-        # Can't use len(moves) below because moves may have Nones in it
-        if len([m for m in self.moves if m]) >= 3:
-            if len(set([m.name for m in self.moves[-3:]])) == 1 \
-                and self.moves[-1].name == move.name:
-                move.rotate()
-
         self.moves.append(move)
 
     def update(self):
+        """One tick of the simulation; nothing is drawn until draw()"""
         self.animate()
-        self.draw()
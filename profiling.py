@@ -0,0 +1,153 @@
+import csv
+import time
+
+from pathlib import Path
+
+import numpy as np
+import pygame as pg
+
+
+class StartupProfile():
+    def __init__(self, start: float | None = None):
+        """
+        Wall-clock time spent in each step of startup. {start} is a
+        time.perf_counter() reading taken before the first step, e.g.
+        before the heavy imports.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.last  = self.start
+        self.steps = []  # [(label, seconds)]
+
+    def mark(self, label: str):
+        """Ends the step called {label}, which began at the previous mark"""
+        now = time.perf_counter()
+        self.steps.append((label, now - self.last))
+        self.last = now
+
+    def report(self) -> str:
+        total = self.last - self.start
+        lines = ['== startup ==']
+        for label, seconds in self.steps:
+            lines.append(f'  {label:<16}{seconds * 1000:>8.1f} ms'
+                         f'{seconds / total:>8.1%}')
+        lines.append(f'  {"time to frame":<16}{total * 1000:>8.1f} ms')
+
+        return '\n'.join(lines)
+
+
+class FrameProfile():
+    phases = ('events', 'board update', 'board draw', 'queue update',
+              'queue draw', 'info update', 'game logic', 'composite',
+              'scale2x', 'overlay', 'display')
+
+    def __init__(self, capacity: int = 300, csv_path: Path | None = None):
+        """
+        Milliseconds spent in each of {phases}, per frame. The last
+        {capacity} frames are kept in {records}, a ring buffer (see
+        get_records()), and every frame is also written to {csv_path}
+        if given.
+
+        mark() charges the time since the previous mark to a phase, and
+        adds to it rather than replacing it, so a phase can be split up
+        by others (e.g. board update on either side of board draw).
+        """
+        self.capacity   = capacity
+        self.current    = [0.0] * len(self.phases)
+        self.last       = time.perf_counter()
+        self.num_frames = 0
+        self.records    = np.zeros((capacity, len(self.phases)),
+                                   dtype=np.float32)
+
+        self.csv_file = None
+        self.writer   = None
+        if csv_path:
+            self.csv_file = open(csv_path, 'w', newline='')
+            self.writer = csv.writer(self.csv_file)
+            self.writer.writerow(['frame', *self.phases, 'total'])
+
+        self.legend = []  # Rendered mean times, see draw()
+
+        self.colors = []
+        for n in range(len(self.phases)):
+            color = pg.Color(0)
+            color.hsva = (360 * n / len(self.phases), 70, 100, 100)
+            self.colors.append(color)
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.writer = None
+
+    def draw(self, surface: pg.Surface, font: pg.font.Font,
+             num_frames: int = 120, budget: float = 1000 / 30) -> pg.Rect:
+        """
+        Draws a stacked bar per frame for the last {num_frames} frames in
+        the top right corner of {surface}, with a line at {budget} ms
+        and the mean time per phase. Returns the area drawn over.
+        """
+        bar_width, ms_height, graph_height = 2, 2, 100
+        line_height = font.get_linesize()
+        num_lines = len(self.phases) + 1
+        rect = pg.Rect(0, 0, num_frames * bar_width + 8,
+                       graph_height + line_height * num_lines + 12)
+        rect.topright = (surface.get_width(), 0)
+
+        records = self.get_records()[-num_frames:]
+        surface.fill((0, 0, 0), rect)
+
+        # Height of the top of each phase's segment, capped to the graph
+        tops = np.minimum(np.cumsum(records, axis=1) * ms_height,
+                          graph_height).round().astype(int).tolist()
+        bottom = rect.top + 4 + graph_height
+        for n, frame_tops in enumerate(tops):
+            x = rect.left + 4 + n * bar_width
+            base = 0
+            for color, top in zip(self.colors, frame_tops):
+                if top > base:
+                    surface.fill(color, (x, bottom - top, bar_width,
+                                         top - base))
+                    base = top
+
+        budget_y = bottom - round(budget * ms_height)
+        pg.draw.line(surface, (255, 255, 255), (rect.left + 4, budget_y),
+                     (rect.right - 5, budget_y))
+
+        if not self.legend or not self.num_frames % 15:  # Keep it readable
+            means = records.mean(axis=0) if len(records) else self.current
+            lines = [(f'{phase:<14}{ms:>6.2f} ms', color) for phase, ms, color
+                     in zip(self.phases, means, self.colors)]
+            lines.append((f'{"total":<14}{sum(means):>6.2f} ms',
+                          (255, 255, 255)))
+            self.legend = [font.render(text, False, color)
+                           for text, color in lines]
+
+        for n, image in enumerate(self.legend):
+            surface.blit(image, (rect.left + 4, bottom + 4 + n * line_height))
+
+        return rect
+
+    def end_frame(self):
+        self.records[self.num_frames % self.capacity] = self.current
+        if self.writer:
+            self.writer.writerow([self.num_frames]
+                                 + [f'{ms:.3f}' for ms in self.current]
+                                 + [f'{sum(self.current):.3f}'])
+        self.num_frames += 1
+
+    def get_records(self) -> np.ndarray:
+        """(frames, phases) array of the buffered frames, oldest first"""
+        if self.num_frames < self.capacity:
+            return self.records[:self.num_frames].copy()
+
+        start = self.num_frames % self.capacity
+        return np.concatenate([self.records[start:], self.records[:start]])
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.current[self.phases.index(phase)] += (now - self.last) * 1000
+        self.last = now
+
+    def start_frame(self):
+        self.current = [0.0] * len(self.phases)
+        self.last = time.perf_counter()
@@ -0,0 +1,211 @@
+import argparse
+import random
+import struct
+import time
+
+from collections import namedtuple
+from pathlib import Path
+
+import engine
+
+from const import MOVES
+
+
+HEADER = struct.Struct('<4sBqHH')  # Magic, version, seed, rows, cols
+MAGIC = b'DICE'
+RECORD = struct.Struct('<BHH')  # Kind, row, col
+VERSION = 1
+
+# Record kinds; 0-3 are moves, by the index of the active move in MOVES
+NEXT_LEVEL = 4  # {row} holds the new level
+NEW_GAME = 5
+
+MOVE_INDICES = {name: n for n, (name, _, _) in enumerate(MOVES)}
+
+Record   = namedtuple('Record', ['kind', 'row', 'col'])
+Snapshot = namedtuple('Snapshot', ['index', 'values', 'moves', 'rng_state',
+                                   'level', 'score', 'num_moves',
+                                   'most_dice'])
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayLog():
+    def __init__(self, seed: int, num_rows: int = 8, num_cols: int = 8,
+                 data: bytes = b''):
+        """
+        Everything needed to play a session back: the seed its boards
+        and moves were dealt from, then one RECORD per choice the player
+        made (a die played in the active move's direction, going on to
+        the next level or starting a new game). Failed moves change
+        nothing, so they aren't recorded.
+        """
+        self.seed     = seed
+        self.num_cols = num_cols
+        self.num_rows = num_rows
+
+        self.data = bytearray(data)
+
+    def __getitem__(self, index: int) -> Record:
+        if not -1 < index < len(self):
+            raise IndexError
+
+        return Record(*RECORD.unpack_from(self.data, index * RECORD.size))
+
+    def __len__(self) -> int:
+        return len(self.data) // RECORD.size
+
+    def __repr__(self) -> str:
+        return f'ReplayLog: seed {self.seed}, {len(self)} records'
+
+    def add(self, kind: int, row: int = 0, col: int = 0):
+        self.data += RECORD.pack(kind, row, col)
+
+    def add_move(self, row: int, col: int, move: 'Move | engine.MoveState'):
+        self.add(MOVE_INDICES[move.name], row, col)
+
+    def copy(self, num_records: int | None = None) -> 'ReplayLog':
+        """Copy of the first {num_records} records (default: all)"""
+        end = len(self.data) if num_records is None \
+            else num_records * RECORD.size
+        return ReplayLog(self.seed, self.num_rows, self.num_cols,
+                         self.data[:end])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ReplayLog':
+        magic, version, seed, num_rows, num_cols = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError('Not a replay log')
+        if version != VERSION:
+            raise ReplayError(f'Unsupported replay log version {version}')
+
+        return cls(seed, num_rows, num_cols, data[HEADER.size:])
+
+    @classmethod
+    def load(cls, path: Path) -> 'ReplayLog':
+        return cls.from_bytes(Path(path).read_bytes())
+
+    def save(self, path: Path):
+        Path(path).write_bytes(self.to_bytes())
+
+    def to_bytes(self) -> bytes:
+        return HEADER.pack(MAGIC, VERSION, self.seed, self.num_rows,
+                           self.num_cols) + self.data
+
+
+class Playback():
+    def __init__(self, log: ReplayLog, snapshot_interval: int = 100):
+        """
+        Plays {log} through the rules engine alone, with nothing drawn.
+        {state} is the session after the first {index} records. As each
+        multiple of {snapshot_interval} is first reached, a snapshot is
+        kept, so seek() never replays more than that many records.
+        """
+        self.log               = log
+        self.snapshot_interval = snapshot_interval
+
+        self.index     = 0
+        self.state     = None
+        self.new_game()
+        self.snapshots = [self.take_snapshot()]
+
+    def apply(self, record: Record):
+        """Plays one record, raising ReplayError if it can't be played"""
+        if record.kind == NEXT_LEVEL:
+            self.state.board = engine.roll_board(
+                self.log.num_rows, self.log.num_cols, self.state.queue.rng)
+            self.state.level += 1
+            self.state.num_moves = 0
+        elif record.kind == NEW_GAME:
+            self.new_game()
+        else:
+            active = self.state.queue.get_active_move()
+            if active.name != MOVES[record.kind][0]:
+                raise ReplayError(
+                    f'Record {self.index}: {MOVES[record.kind][0]} recorded '
+                    f'but {active.name} is active')
+
+            result = self.state.apply_move(record.row, record.col)
+            if result.status:
+                raise ReplayError(
+                    f'Record {self.index}: ({record.row}, {record.col}) '
+                    f'failed with status {result.status}')
+
+    def new_game(self):
+        """Deals the way Game does: the board first, then the queue"""
+        if self.state is None:
+            rng = engine.make_rngs(self.log.seed)[0]
+        else:
+            rng = self.state.queue.rng
+
+        board = engine.roll_board(self.log.num_rows, self.log.num_cols, rng)
+        self.state = engine.GameState(board, engine.QueueState(rng), rng=rng)
+
+    def restore_snapshot(self, snapshot: Snapshot):
+        rng = random.Random()
+        queue = engine.QueueState(rng, lookahead=0)
+        queue.moves = list(snapshot.moves)
+        rng.setstate(snapshot.rng_state)  # After the queue dealt its own move
+
+        board = engine.BoardState(self.log.num_rows, self.log.num_cols,
+                                  snapshot.values.copy())
+        self.state = engine.GameState(board, queue, snapshot.level, rng)
+        self.state.most_dice = snapshot.most_dice
+        self.state.num_moves = snapshot.num_moves
+        self.state.score = snapshot.score
+        self.index = snapshot.index
+
+    def seek(self, index: int) -> engine.GameState:
+        """The session after the first {index} records"""
+        index = max(0, min(index, len(self.log)))
+        nearest = min(index // self.snapshot_interval, len(self.snapshots) - 1)
+        if not nearest * self.snapshot_interval <= self.index <= index:
+            self.restore_snapshot(self.snapshots[nearest])
+
+        while self.index < index:
+            self.step()
+
+        return self.state
+
+    def step(self):
+        self.apply(self.log[self.index])
+        self.index += 1
+
+        if self.index == len(self.snapshots) * self.snapshot_interval:
+            self.snapshots.append(self.take_snapshot())
+
+    def take_snapshot(self) -> Snapshot:
+        state = self.state
+        return Snapshot(self.index, state.board.values.copy(),
+                        tuple(state.queue.moves), state.queue.rng.getstate(),
+                        state.level, state.score, state.num_moves,
+                        state.most_dice)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fast-forward a replay log through the rules engine')
+    parser.add_argument('log', type=Path)
+    parser.add_argument('-s', '--seek', type=int, default=None,
+                        help='stop after this many records (default: all)')
+    args = parser.parse_args()
+
+    log = ReplayLog.load(args.log)
+    print(log)
+
+    start = time.perf_counter()
+    state = Playback(log).seek(len(log) if args.seek is None else args.seek)
+    elapsed = time.perf_counter() - start
+
+    print(f'level {state.level}, score {state.score}, '
+          f'{state.num_moves} moves this level, '
+          f'active move {state.queue.get_active_move().name}')
+    for row in state.board.values:
+        print(' '.join('.' if value < 0 else str(value) for value in row))
+    print(f'in {elapsed * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+from collections import namedtuple
+from pathlib import Path
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    id        INTEGER PRIMARY KEY,
+    seed      INTEGER,
+    num_rows  INTEGER NOT NULL,
+    num_cols  INTEGER NOT NULL,
+    started   REAL NOT NULL,
+    ended     REAL,
+    score     INTEGER NOT NULL DEFAULT 0,
+    level     INTEGER NOT NULL DEFAULT 1,
+    most_dice INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS levels (
+    session_id INTEGER NOT NULL REFERENCES sessions (id),
+    level      INTEGER NOT NULL,
+    status     INTEGER NOT NULL,
+    points     INTEGER NOT NULL,
+    num_moves  INTEGER NOT NULL,
+    finished   REAL NOT NULL,
+    PRIMARY KEY (session_id, level)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_score ON sessions (score DESC);
+CREATE INDEX IF NOT EXISTS sessions_by_level ON sessions (level DESC);
+CREATE INDEX IF NOT EXISTS sessions_by_most_dice ON sessions (most_dice DESC);
+CREATE INDEX IF NOT EXISTS levels_by_points ON levels (level, points DESC);
+'''
+
+# Writer queue markers
+CLOSE = None
+FLUSH = 'flush'
+
+Bests = namedtuple('Bests', ['score', 'level', 'most_dice'])
+Entry = namedtuple('Entry', ['score', 'level', 'most_dice', 'seed', 'started'])
+
+
+def connect(path: Path, **options) -> sqlite3.Connection:
+    db = sqlite3.connect(path, **options)
+    db.execute('PRAGMA journal_mode = WAL')  # Readers never wait on writes
+    db.execute('PRAGMA synchronous = NORMAL')  # Still safe in WAL mode
+    return db
+
+
+class ScoreStore():
+    def __init__(self, path: Path):
+        """
+        Sessions, per-level results and best scores, kept in an SQLite
+        database at {path}. Writes only go on a queue, which a thread of
+        its own commits in one transaction per flush(), so the frame loop
+        never waits on the disk. {bests} are the all-time bests, read
+        once and then kept up to date as results come in.
+        """
+        self.path = Path(path)
+
+        self.db = connect(self.path)  # Only read from, on the caller's thread
+        with self.db:
+            self.db.executescript(SCHEMA)
+        self.bests = self.get_bests()
+
+        # Opened here so that failing to open it fails here too
+        self.writer_db = connect(self.path, check_same_thread=False)
+        self.error     = None  # The last write that failed, if any
+        self.num_lost  = 0  # Statements in batches that failed
+
+        self.pending = queue.Queue()  # (sql, params), FLUSH or CLOSE
+        self.thread  = threading.Thread(target=self.run, name='scores',
+                                        daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """
+        Commits whatever is left, then stops the writer; reports how
+        many writes were lost, if any were
+        """
+        self.pending.put(CLOSE)
+        self.thread.join()
+        self.db.close()
+        if self.error:
+            print(f'{self.num_lost} score updates couldn\'t be saved to '
+                  f'{self.path} ({self.error})')
+
+    def end_session(self, session_id: int, score: int, level: int,
+                    most_dice: int):
+        self.update_session(session_id, score, level, most_dice)
+        self.write('UPDATE sessions SET ended = ? WHERE id = ?',
+                   (time.time(), session_id))
+
+    def flush(self):
+        """Has the writer commit everything so far; doesn't wait for it"""
+        self.pending.put(FLUSH)
+
+    def get_bests(self) -> Bests:
+        """Each is a lookup at the top of its own index"""
+        return Bests(*(self.db.execute(
+            f'SELECT COALESCE(MAX({column}), 0) FROM sessions').fetchone()[0]
+            for column in Bests._fields))
+
+    def get_leaderboard(self, limit: int = 10) -> list[Entry]:
+        return [Entry(*row) for row in self.db.execute(
+            'SELECT score, level, most_dice, seed, started FROM sessions '
+            'ORDER BY score DESC LIMIT ?', (limit,))]
+
+    def record_level(self, session_id: int, level: int, status: int,
+                     points: int, num_moves: int):
+        """{status} is how the level ended, as Game.check_win() returns it"""
+        self.write('INSERT OR REPLACE INTO levels VALUES (?, ?, ?, ?, ?, ?)',
+                   (session_id, level, status, points, num_moves, time.time()))
+
+    def run(self):
+        db = self.writer_db
+        batch = []
+        while True:
+            item = self.pending.get()
+            if item is CLOSE or item == FLUSH:
+                if batch:
+                    self.write_batch(db, batch)
+                    batch = []
+                if item is CLOSE:
+                    db.close()
+                    return
+            else:
+                batch.append(item)
+
+    def start_session(self, seed: int | None, num_rows: int,
+                      num_cols: int) -> int:
+        """
+        Returns the new session's id, picked at random here so there's no
+        waiting on the writer for it. {seed} is None if the game can't be
+        dealt again from one.
+        """
+        session_id = random.getrandbits(63)
+        self.write('INSERT INTO sessions (id, seed, num_rows, num_cols, '
+                   'started) VALUES (?, ?, ?, ?, ?)',
+                   (session_id, seed, num_rows, num_cols, time.time()))
+        return session_id
+
+    def update_session(self, session_id: int, score: int, level: int,
+                       most_dice: int):
+        self.bests = Bests(max(self.bests.score, score),
+                           max(self.bests.level, level),
+                           max(self.bests.most_dice, most_dice))
+        self.write('UPDATE sessions SET score = ?, level = ?, most_dice = ? '
+                   'WHERE id = ?', (score, level, most_dice, session_id))
+
+    def write(self, sql: str, params: tuple = ()):
+        self.pending.put((sql, params))
+
+    def write_batch(self, db: sqlite3.Connection, batch: list[tuple]):
+        """
+        Commits {batch} in one transaction, so one sync. If that fails
+        (e.g. the database is locked), the batch is rolled back and
+        dropped, but the writer carries on with the next one.
+        """
+        try:
+            with db:
+                for sql, params in batch:
+                    db.execute(sql, params)
+        except sqlite3.Error as error:
+            print(f'Couldn\'t save {len(batch)} score updates: {error}')
+            self.error = error
+            self.num_lost += len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the best sessions')
+    parser.add_argument('path', type=Path, nargs='?',
+                        default=Path(__file__).parent / 'scores.db')
+    parser.add_argument('-n', '--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    store = ScoreStore(args.path)
+    print(f'best score {store.bests.score}, level {store.bests.level}, '
+          f'{store.bests.most_dice} dice in one match')
+    for n, entry in enumerate(store.get_leaderboard(args.limit), 1):
+        started = time.strftime('%Y-%m-%d %H:%M',
+                                time.localtime(entry.started))
+        seed = '-' if entry.seed is None else entry.seed
+        print(f'{n:>3}. {entry.score:>7}  level {entry.level:<3} '
+              f'{entry.most_dice:>2} dice  seed {seed:<10}  {started}')
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+import argparse
+import random
+import time
+
+from collections import namedtuple
+from collections.abc import Callable
+
+import numpy as np
+
+import engine
+
+from const import EMPTY
+
+
+# Values of the ways a level can end (see engine.get_win_status()), on
+# top of the points scored getting there
+END_VALUES = {1: 0, 2: 500, 3: -1000}
+HINT_TIME  = 0.04  # Seconds per hint, so one always feels instant
+PAIR_VALUE = 2  # Per pair of touching same-value dice left at a leaf
+
+Entry  = namedtuple('Entry', ['remaining', 'value', 'move'])
+Rating = namedtuple('Rating', ['score', 'status', 'line'])
+
+
+class _Timeout(Exception):
+    pass
+
+
+class TranspositionTable():
+    def __init__(self, max_entries: int = 100_000):
+        """
+        Search results by (board hash, moves still to play), so a
+        position reached by different orders of moves (or searched by an
+        earlier hint) is only searched once. Holds at most {max_entries},
+        dropping the oldest first.
+        """
+        self.max_entries = max_entries
+        self.entries     = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> Entry | None:
+        return self.entries.get(key)
+
+    def store(self, key: tuple, entry: Entry):
+        if key not in self.entries and len(self.entries) >= self.max_entries:
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = entry
+
+
+class Zobrist():
+    def __init__(self, num_rows: int, num_cols: int, seed: int = 0):
+        """
+        A random 64-bit key per (space, value); a board hashes to the XOR
+        of the keys of its spaces, so a move only has to XOR in the few
+        spaces it changed
+        """
+        rng = np.random.default_rng(seed)
+        self.keys = rng.integers(0, 2**63, size=(num_rows * num_cols, 9),
+                                 dtype=np.int64).tolist()
+
+    def hash(self, values: np.ndarray) -> int:
+        h = 0
+        for index, value in enumerate(values.ravel().tolist()):
+            h ^= self.keys[index][value - EMPTY]
+        return h
+
+    def update(self, h: int, index: int, old_value: int,
+               new_value: int) -> int:
+        keys = self.keys[index]
+        return h ^ keys[old_value - EMPTY] ^ keys[new_value - EMPTY]
+
+
+def count_pairs(values: np.ndarray) -> int:
+    """Touching pairs of same-value, non-rock dice"""
+    across = (values[:, 1:] == values[:, :-1]) & (values[:, 1:] > 0)
+    down = (values[1:, :] == values[:-1, :]) & (values[1:, :] > 0)
+    return int(across.sum() + down.sum())
+
+
+def get_counts(values: np.ndarray) -> list[int]:
+    """Dice per value, as engine.get_win_status() takes them"""
+    return np.bincount(values[values > 0], minlength=7).tolist()
+
+
+class Solver():
+    def __init__(self, num_rows: int = 8, num_cols: int = 8,
+                 max_entries: int = 100_000, beam_width: int = 4):
+        """
+        Searches the choices of die for a known sequence of moves, i.e.
+        the part of the queue that's showing. After the first move, only
+        the {beam_width} highest-scoring choices are searched further.
+        The transposition table is kept between searches, so asking again
+        after each move reuses most of the previous search.
+        """
+        self.beam_width = beam_width
+        self.num_cols   = num_cols
+        self.num_rows   = num_rows
+
+        self.cancelled = None
+        self.deadline  = None
+        self.nodes     = 0  # Searched by the last hint()
+        self.partial   = None  # See hint()
+        self.table     = TranspositionTable(max_entries)
+        self.zobrist   = Zobrist(num_rows, num_cols)
+
+    def expand(self, board: engine.BoardState, counts: list[int], h: int,
+               coords: tuple[int], move: 'engine.MoveState',
+               level: int) -> tuple:
+        """
+        Plays the die at {coords} on a copy of {board}; returns the new
+        (board, counts, hash) and the points scored
+        """
+        child = board.copy()
+        value = int(board.values[coords])
+        result = engine.apply_move(child, *coords, move, level)
+
+        num_cols = self.num_cols
+        if result.destination != coords:
+            h = self.zobrist.update(h, coords[0] * num_cols + coords[1],
+                                    value, EMPTY)
+            h = self.zobrist.update(h, result.destination[0] * num_cols
+                                    + result.destination[1], EMPTY, value)
+        if result.matched:
+            counts = counts.copy()
+            counts[value] -= len(result.matched)
+            for row, col in result.matched:
+                h = self.zobrist.update(h, row * num_cols + col, value, EMPTY)
+
+        return child, counts, h, result.points
+
+    def hint(self, board: engine.BoardState, moves: list['engine.MoveState'],
+             level: int = 1, time_limit: float = HINT_TIME,
+             max_depth: int | None = None,
+             cancelled: 'threading.Event | None' = None) -> tuple[int] | None:
+        """
+        Coords of the die to play next, searching {moves} (the active move
+        first) deeper and deeper until {time_limit} seconds run out,
+        {cancelled} is set or every move is searched; each pass searches
+        the previous pass's best line first. If even the first pass is cut
+        short, it's the best die that pass got to. None only if no die
+        can move.
+        """
+        self.cancelled = cancelled
+        self.deadline = time.perf_counter() + time_limit
+        self.nodes = 0
+        self.partial = None  # Best first move of the pass so far
+        max_depth = len(moves) if max_depth is None \
+            else min(max_depth, len(moves))
+
+        values = board.values
+        counts = get_counts(values)
+        h = self.zobrist.hash(values)
+        queue_keys = [hash((level, *(move.name for move in moves[n:]))) for n
+                      in range(len(moves) + 1)]
+
+        best = None
+        for depth in range(1, max_depth + 1):
+            try:
+                _, move = self.search(board, counts, h, moves, queue_keys, 0,
+                                      depth, level)
+            except _Timeout:
+                if best is None:  # Timed out before the end of a pass
+                    legal = engine.legal_moves(board, moves[0])
+                    best = self.partial or (legal[0] if legal else None)
+                break
+            best = move
+
+        return best
+
+    def beam_search(self, board: engine.BoardState,
+                    moves: list['engine.MoveState'], level: int,
+                    beam_width: int, key: Callable[[tuple], tuple]):
+        """
+        Plays {moves} in order, keeping only the {beam_width} boards that
+        rank highest by {key} after each move; boards reached more than
+        one way are kept once. {key} takes (score, board, counts, hash,
+        line). Yields (score, status, line) for each line that ends the
+        level, shortest lines first.
+        """
+        beam = [(0, board, get_counts(board.values),
+                 self.zobrist.hash(board.values), [])]
+        for move in moves:
+            children = {}
+            for score, board, counts, h, line in beam:
+                legal = engine.legal_moves(board, move)
+                status = engine.get_win_status(counts, bool(legal))
+                if status:
+                    yield score, status, line
+                    continue
+
+                for coords in legal:
+                    child, child_counts, child_h, points = self.expand(
+                        board, counts, h, coords, move, level)
+                    if child_h not in children \
+                            or children[child_h][0] < score + points:
+                        children[child_h] = (score + points, child,
+                                             child_counts, child_h,
+                                             line + [coords])
+
+            beam = sorted(children.values(), key=key,
+                          reverse=True)[:beam_width]
+            if not beam:
+                return
+
+    def rate(self, state: engine.GameState, max_moves: int = 300,
+             beam_width: int = 32) -> Rating:
+        """
+        Best score this level of {state} can end on, by beam search. The
+        moves to come are known, since the queue deals them from its own
+        rng no matter which dice are played.
+        """
+        rng = random.Random()
+        rng.setstate(state.queue.rng.getstate())
+        queue = engine.QueueState(rng, lookahead=0)
+        queue.moves = list(state.queue.moves)
+        while len(queue.moves) < max_moves:
+            queue.spawn_move()
+
+        best = Rating(0, 0, [])
+        for score, status, line in self.beam_search(
+                state.board, queue.moves, state.level, beam_width,
+                key=lambda c: c[0] + count_pairs(c[1].values) * PAIR_VALUE):
+            if (score, status) > (best.score, best.status):
+                best = Rating(score, status, line)
+
+        return best
+
+    def solve(self, board: engine.BoardState, moves: list['engine.MoveState'],
+              level: int = 1, beam_width: int = 32) -> list[tuple[int]] | None:
+        """
+        A line clearing every die off {board} within {moves}, by beam
+        search favoring the fewest dice left; None if none was found
+        """
+        for _, status, line in self.beam_search(
+                board, moves, level, beam_width,
+                key=lambda c: (-sum(c[2]), count_pairs(c[1].values))):
+            if status == 2:
+                return line
+
+        return None
+
+    def search(self, board: engine.BoardState, counts: list[int], h: int,
+               moves: list['engine.MoveState'], queue_keys: list[int],
+               depth: int, remaining: int, level: int) -> tuple:
+        """
+        (value, coords) of the best die to play for moves[{depth}], looking
+        {remaining} moves ahead. Lines that end the level stop there,
+        valued by END_VALUES.
+        """
+        if time.perf_counter() > self.deadline \
+                or (self.cancelled and self.cancelled.is_set()):
+            raise _Timeout
+        self.nodes += 1
+
+        key = (h, queue_keys[depth])
+        entry = self.table.get(key)
+        if entry is not None and entry.remaining >= remaining:
+            return entry.value, entry.move
+
+        if depth == len(moves):  # Past the end of the queue
+            if not any(counts[1:]):
+                return END_VALUES[2], None
+            return count_pairs(board.values) * PAIR_VALUE, None
+
+        move = moves[depth]
+        if not remaining:  # Only needs to know whether any die can move
+            status = engine.get_win_status(
+                counts, engine.has_legal_move(board, move))
+            if status:
+                return END_VALUES[status], None
+            return count_pairs(board.values) * PAIR_VALUE, None
+
+        legal = engine.legal_moves(board, move)
+        status = engine.get_win_status(counts, bool(legal))
+        if status:
+            return END_VALUES[status], None
+
+        # The last pass's best move first, then the biggest matches
+        best_move = None if entry is None else entry.move
+        children = sorted(
+            ((coords, *self.expand(board, counts, h, coords, move, level))
+             for coords in legal), reverse=True,
+            key=lambda c: (c[0] == best_move, c[-1]))
+        if depth:  # Every first move is searched; after that, only the best
+            children = children[:self.beam_width]
+        else:  # Until one is searched, the first in order is the best bet
+            self.partial = children[0][0]
+
+        best_value = None
+        for coords, child, child_counts, child_h, points in children:
+            value = points + self.search(child, child_counts, child_h, moves,
+                                         queue_keys, depth + 1, remaining - 1,
+                                         level)[0]
+            if best_value is None or value > best_value:
+                best_value, best_move = value, coords
+                if not depth:
+                    self.partial = coords
+
+        self.table.store(key, Entry(remaining, best_value, best_move))
+        return best_value, best_move
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Hint timings and best scores for dealt levels')
+    parser.add_argument('-n', '--levels', type=int, default=10)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, default=8)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--beam-width', type=int, default=32)
+    parser.add_argument('--time-limit', type=float, default=HINT_TIME,
+                        help='seconds per hint')
+    args = parser.parse_args()
+
+    solver = Solver(args.rows, args.cols)
+    for n in range(args.levels):
+        rng = engine.make_rngs(args.seed + n)[0]
+        state = engine.GameState(
+            engine.roll_board(args.rows, args.cols, rng),
+            engine.QueueState(rng), rng=rng)
+
+        start = time.perf_counter()
+        coords = solver.hint(state.board, state.queue.moves,
+                             time_limit=args.time_limit)
+        hint_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rating = solver.rate(state, beam_width=args.beam_width)
+        rate_time = time.perf_counter() - start
+
+        print(f'seed {args.seed + n}: hint {coords} in '
+              f'{hint_time * 1000:.1f} ms ({solver.nodes} nodes); best score '
+              f'{rating.score} ({len(rating.line)} moves, status '
+              f'{rating.status}) in {rate_time:.2f} s')
+
+
+if __name__ == '__main__':
+    main()